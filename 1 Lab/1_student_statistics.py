@@ -1,4 +1,9 @@
+import heapq
+import sys
 from functools import reduce
+from itertools import chain
+
+import numpy as np
 
 
 students = [
@@ -38,10 +43,130 @@ def find_top_student(students):
     averages = calculate_average_grades(students)
     return max(averages, key=lambda student: student["average_grade"])
 
-filtered_students = filter_students_by_age(students, 23)
-average_grades = calculate_average_grades(filtered_students)
-top_student = find_top_student(filtered_students)
+def build_student_columns(students):
+    name_ids = {}
+    name_codes = np.fromiter(
+        map(lambda student: name_ids.setdefault(sys.intern(student["name"]), len(name_ids)), students),
+        dtype=np.int32, count=len(students))
+    ages = np.fromiter(map(lambda student: student["age"], students), dtype=np.int32, count=len(students))
+    grade_counts = np.fromiter(map(lambda student: len(student["grades"]), students), dtype=np.int32, count=len(students))
+
+    grades = np.zeros((len(students), int(grade_counts.max(initial=0))))
+    grades[np.arange(grades.shape[1]) < grade_counts[:, None]] = np.fromiter(
+        chain.from_iterable(map(lambda student: student["grades"], students)), dtype=float)
+
+    return {
+        "names": np.array(list(name_ids), dtype=object),
+        "name_codes": name_codes,
+        "ages": ages,
+        "grades": grades,
+        "grade_counts": grade_counts,
+        "average_grades": grades.sum(axis=1) / grade_counts,
+    }
+
+def filter_student_columns_by_age(columns, age):
+    mask = columns["ages"] >= age
+    return {key: value if key == "names" else value[mask] for key, value in columns.items()}
+
+def calculate_average_grades_columnar(columns):
+    names = columns["names"][columns["name_codes"]].tolist()
+    return list(map(lambda name, average: {"name": name, "average_grade": average},
+                    names, columns["average_grades"].tolist()))
+
+def find_top_student_columnar(columns):
+    top = int(np.argmax(columns["average_grades"]))
+    return {
+        "name": columns["names"][columns["name_codes"][top]],
+        "average_grade": float(columns["average_grades"][top]),
+    }
+
+def create_leaderboard(students=()):
+    leaderboard = {"heaps": {}, "items": 0, "entries": {}, "next_order": 0}
+    for student in students:
+        add_student_to_leaderboard(leaderboard, student)
+    return leaderboard
+
+def push_leaderboard_entry(leaderboard, name):
+    entry = leaderboard["entries"][name]
+    entry["version"] += 1
+    heap = leaderboard["heaps"].setdefault(entry["age"], [])
+    heapq.heappush(heap, (-entry["grades_sum"] / entry["grades_count"], entry["order"], entry["version"], name))
+    leaderboard["items"] += 1
+
+    if leaderboard["items"] > 2 * len(leaderboard["entries"]) + 64:
+        compact_leaderboard(leaderboard)
+
+def compact_leaderboard(leaderboard):
+    for age, heap in list(leaderboard["heaps"].items()):
+        heap[:] = [item for item in heap if is_leaderboard_item_current(leaderboard, item)]
+        heapq.heapify(heap)
+        if not heap:
+            del leaderboard["heaps"][age]
+    leaderboard["items"] = sum(map(len, leaderboard["heaps"].values()))
+
+def is_leaderboard_item_current(leaderboard, item):
+    entry = leaderboard["entries"].get(item[3])
+    return entry is not None and entry["version"] == item[2]
+
+def add_student_to_leaderboard(leaderboard, student):
+    entry = leaderboard["entries"].get(student["name"])
+    if entry is None:
+        entry = {"order": leaderboard["next_order"], "version": 0}
+        leaderboard["entries"][student["name"]] = entry
+        leaderboard["next_order"] += 1
+    entry["age"] = student["age"]
+    entry["grades_sum"] = reduce(lambda x, y: x + y, student["grades"])
+    entry["grades_count"] = len(student["grades"])
+    push_leaderboard_entry(leaderboard, student["name"])
+
+def add_grade_to_leaderboard(leaderboard, name, grade):
+    entry = leaderboard["entries"][name]
+    entry["grades_sum"] += grade
+    entry["grades_count"] += 1
+    push_leaderboard_entry(leaderboard, name)
+
+def peek_leaderboard_heap(leaderboard, heap):
+    while heap and not is_leaderboard_item_current(leaderboard, heap[0]):
+        heapq.heappop(heap)
+        leaderboard["items"] -= 1
+    return heap[0] if heap else None
+
+def get_top_students(leaderboard, k, age=None):
+    heaps = [heap for heap_age, heap in leaderboard["heaps"].items() if age is None or heap_age >= age]
+    candidates = []
+    for index, heap in enumerate(heaps):
+        item = peek_leaderboard_heap(leaderboard, heap)
+        if item is not None:
+            candidates.append((item, index))
+    heapq.heapify(candidates)
+
+    top_students, popped = [], []
+    while candidates and len(top_students) < k:
+        item, index = heapq.heappop(candidates)
+        popped.append((heapq.heappop(heaps[index]), index))
+        top_students.append({"name": item[3], "average_grade": -item[0]})
+        next_item = peek_leaderboard_heap(leaderboard, heaps[index])
+        if next_item is not None:
+            heapq.heappush(candidates, (next_item, index))
+    for item, index in popped:
+        heapq.heappush(heaps[index], item)
+    return top_students
+
+if __name__ == "__main__":
+    filtered_students = filter_students_by_age(students, 23)
+    average_grades = calculate_average_grades(filtered_students)
+    top_student = find_top_student(filtered_students)
+
+    print("Отфильтрованные студенты:", filtered_students)
+    print("Средние баллы:", average_grades)
+    print("Студент с самым высоким средним баллом:", top_student)
+
+    student_columns = filter_student_columns_by_age(build_student_columns(students), 23)
+
+    print("Средние баллы (NumPy):", calculate_average_grades_columnar(student_columns))
+    print("Студент с самым высоким средним баллом (NumPy):", find_top_student_columnar(student_columns))
+
+    leaderboard = create_leaderboard(students)
+    add_grade_to_leaderboard(leaderboard, "Jack", 100)
 
-print("Отфильтрованные студенты:", filtered_students)
-print("Средние баллы:", average_grades)
-print("Студент с самым высоким средним баллом:", top_student)
+    print("Топ-3 студентов от 23 лет:", get_top_students(leaderboard, 3, 23))
@@ -1,3 +1,4 @@
+import json
 from functools import reduce
 
 
@@ -38,10 +39,37 @@ def get_total_expenses_of_filtered_users(filtered_users):
     total_expenses = calculate_total_expenses(filtered_users)
     return reduce(lambda x, y: x + y["total_expense"], total_expenses, 0)
 
-filtered_users = filter_users_by_expense(users, 1400)
-calculated_expenses = calculate_total_expenses(filtered_users)
-total_expense_sum = get_total_expenses_of_filtered_users(filtered_users)
+def read_users_ndjson(path):
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
 
-print("Отфильтрованные пользователи:", filtered_users)
-print("Общая сумма расходов:", calculated_expenses)
-print("Общая сумма расходов отфильтрованных пользователей:", total_expense_sum)
+def stream_total_expenses(users):
+    return map(lambda user: {"name": user["name"], "total_expense": sum(user["expenses"])}, users)
+
+def stream_filtered_total_expenses(users, min_expense):
+    return filter(lambda user: user["total_expense"] >= min_expense, stream_total_expenses(users))
+
+def write_expenses_report(input_path, output_path, min_expense):
+    total_expense_sum = 0
+    with open(output_path, "w", encoding="utf-8") as output:
+        for user in stream_filtered_total_expenses(read_users_ndjson(input_path), min_expense):
+            output.write(json.dumps(user, ensure_ascii=False) + "\n")
+            total_expense_sum += user["total_expense"]
+    return total_expense_sum
+
+if __name__ == "__main__":
+    filtered_users = filter_users_by_expense(users, 1400)
+    calculated_expenses = calculate_total_expenses(filtered_users)
+    total_expense_sum = get_total_expenses_of_filtered_users(filtered_users)
+
+    print("Отфильтрованные пользователи:", filtered_users)
+    print("Общая сумма расходов:", calculated_expenses)
+    print("Общая сумма расходов отфильтрованных пользователей:", total_expense_sum)
+
+    streamed_expenses = list(stream_filtered_total_expenses(users, 1400))
+
+    print("Общая сумма расходов (потоковый режим):", streamed_expenses)
+    print("Общая сумма расходов отфильтрованных пользователей (потоковый режим):",
+          reduce(lambda x, y: x + y["total_expense"], streamed_expenses, 0))
@@ -35,10 +35,42 @@ def calculate_average_order_amount(orders):
     total_amount = calculate_total_amount(orders)
     return total_amount / len(orders)
 
-filtered_orders = filter_orders_by_customer_id(orders, 101)
-total_amount = calculate_total_amount(filtered_orders)
-average_amount = calculate_average_order_amount(filtered_orders)
+def create_order_store(orders):
+    customer_index = {}
+    for position, order in enumerate(orders):
+        customer_index.setdefault(order["customer_id"], []).append(position)
+    return {
+        "orders": orders,
+        "customer_index": customer_index
+    }
 
-print("Отфильтрованные заказы:", filtered_orders)
-print("Общая сумма заказов для клиента: ", total_amount)
-print("Средняя стоимость заказов для клиента: ", average_amount)
+def get_orders_by_customer_id(order_store, customer_id):
+    return list(map(lambda position: order_store["orders"][position],
+                    order_store["customer_index"].get(customer_id, [])))
+
+def group_orders_by_customer(orders):
+    def add_order(groups, order):
+        group = groups.setdefault(order["customer_id"], {"count": 0, "total_amount": 0})
+        group["count"] += 1
+        group["total_amount"] += order["amount"]
+        return groups
+
+    groups = reduce(add_order, orders, {})
+    for group in groups.values():
+        group["average_amount"] = group["total_amount"] / group["count"]
+    return groups
+
+if __name__ == "__main__":
+    filtered_orders = filter_orders_by_customer_id(orders, 101)
+    total_amount = calculate_total_amount(filtered_orders)
+    average_amount = calculate_average_order_amount(filtered_orders)
+
+    print("Отфильтрованные заказы:", filtered_orders)
+    print("Общая сумма заказов для клиента: ", total_amount)
+    print("Средняя стоимость заказов для клиента: ", average_amount)
+
+    order_store = create_order_store(orders)
+    customer_stats = group_orders_by_customer(orders)
+
+    print("Заказы клиента (по индексу):", get_orders_by_customer_id(order_store, 101))
+    print("Статистика заказов по клиентам:", customer_stats)
@@ -0,0 +1,114 @@
+import importlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+
+
+student_statistics = importlib.import_module("1_student_statistics")
+expenses = importlib.import_module("2_expenses")
+orders = importlib.import_module("3_orders")
+
+
+def split_file_into_chunks(path, chunk_count):
+    file_size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as file:
+        for chunk in range(1, chunk_count):
+            file.seek(max(file_size * chunk // chunk_count, boundaries[-1]))
+            file.readline()
+            boundaries.append(file.tell())
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+def read_chunk_records(path, start, end):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while file.tell() < end:
+            line = file.readline()
+            if line.strip():
+                yield json.loads(line)
+
+def map_student_chunk(path, min_age, chunk):
+    filtered_students = student_statistics.filter_students_by_age(list(read_chunk_records(path, *chunk)), min_age)
+    average_grades = student_statistics.calculate_average_grades(filtered_students)
+    return {
+        "average_grades": average_grades,
+        "top_student": max(average_grades, key=lambda student: student["average_grade"], default=None)
+    }
+
+def map_expense_chunk(path, min_expense, chunk):
+    filtered_users = expenses.filter_users_by_expense(list(read_chunk_records(path, *chunk)), min_expense)
+    total_expenses = expenses.calculate_total_expenses(filtered_users)
+    return {
+        "total_expenses": total_expenses,
+        "total_expense_sum": reduce(lambda x, y: x + y["total_expense"], total_expenses, 0)
+    }
+
+def map_order_chunk(path, customer_id, chunk):
+    filtered_orders = orders.filter_orders_by_customer_id(list(read_chunk_records(path, *chunk)), customer_id)
+    return {
+        "total_amount": orders.calculate_total_amount(filtered_orders),
+        "count": len(filtered_orders)
+    }
+
+def run_sharded(map_chunk, path, argument, workers=None):
+    workers = workers or os.cpu_count()
+    chunks = split_file_into_chunks(path, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(map_chunk, path, argument), chunks))
+
+def pick_top_student(best, student):
+    if best is None or (student is not None and student["average_grade"] > best["average_grade"]):
+        return student
+    return best
+
+def run_student_statistics(path, min_age, workers=None):
+    partials = run_sharded(map_student_chunk, path, min_age, workers)
+    return {
+        "average_grades": [student for result in partials for student in result["average_grades"]],
+        "top_student": reduce(pick_top_student, map(lambda result: result["top_student"], partials), None)
+    }
+
+def run_expenses_report(path, min_expense, workers=None):
+    partials = run_sharded(map_expense_chunk, path, min_expense, workers)
+    return {
+        "total_expenses": [user for result in partials for user in result["total_expenses"]],
+        "total_expense_sum": reduce(lambda x, y: x + y["total_expense_sum"], partials, 0)
+    }
+
+def run_orders_report(path, customer_id, workers=None):
+    partials = run_sharded(map_order_chunk, path, customer_id, workers)
+    total_amount = reduce(lambda x, y: x + y["total_amount"], partials, 0)
+    count = reduce(lambda x, y: x + y["count"], partials, 0)
+    return {
+        "total_amount": total_amount,
+        "average_amount": total_amount / count if count else None
+    }
+
+def write_ndjson(path, records):
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as data_dir:
+        students_path = os.path.join(data_dir, "students.ndjson")
+        users_path = os.path.join(data_dir, "users.ndjson")
+        orders_path = os.path.join(data_dir, "orders.ndjson")
+        write_ndjson(students_path, student_statistics.students)
+        write_ndjson(users_path, expenses.users)
+        write_ndjson(orders_path, orders.orders)
+
+        student_report = run_student_statistics(students_path, 23)
+        expenses_report = run_expenses_report(users_path, 1400)
+        orders_report = run_orders_report(orders_path, 101)
+
+    print("Средние баллы:", student_report["average_grades"])
+    print("Студент с самым высоким средним баллом:", student_report["top_student"])
+    print("Общая сумма расходов:", expenses_report["total_expenses"])
+    print("Общая сумма расходов отфильтрованных пользователей:", expenses_report["total_expense_sum"])
+    print("Общая сумма заказов для клиента: ", orders_report["total_amount"])
+    print("Средняя стоимость заказов для клиента: ", orders_report["average_amount"])
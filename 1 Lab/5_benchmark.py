@@ -0,0 +1,111 @@
+import importlib
+import random
+import sys
+import time
+import tracemalloc
+
+
+student_statistics = importlib.import_module("1_student_statistics")
+expenses = importlib.import_module("2_expenses")
+orders = importlib.import_module("3_orders")
+
+NAMES = [student["name"] for student in student_statistics.students]
+
+
+def generate_students(count, seed=0, grades_per_student=4):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"{rng.choice(NAMES)}{index}",
+            "age": rng.randint(18, 25),
+            "grades": [rng.randint(50, 100) for _ in range(grades_per_student)]
+        }
+        for index in range(count)
+    ]
+
+def generate_users(count, seed=0, expenses_per_user=4):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"{rng.choice(NAMES)}{index}",
+            "expenses": [rng.randint(10, 600) for _ in range(expenses_per_user)]
+        }
+        for index in range(count)
+    ]
+
+def generate_orders(count, seed=0, customer_count=None):
+    rng = random.Random(seed)
+    customer_count = customer_count or max(count // 5, 1)
+    return [
+        {
+            "order_id": index + 1,
+            "customer_id": 100 + rng.randint(1, customer_count),
+            "amount": round(rng.uniform(10, 500), 2)
+        }
+        for index in range(count)
+    ]
+
+def measure(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    function(*args)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak_memory
+
+def build_cases(size, seed):
+    students = generate_students(size, seed)
+    users = generate_users(size, seed)
+    order_list = generate_orders(size, seed)
+    student_columns = student_statistics.build_student_columns(students)
+    order_store = orders.create_order_store(order_list)
+    customer_ids = list(order_store["customer_index"])[:100]
+
+    return [
+        ("students", "filter_students_by_age", "reduce", student_statistics.filter_students_by_age, (students, 23)),
+        ("students", "filter_students_by_age", "numpy", student_statistics.filter_student_columns_by_age, (student_columns, 23)),
+        ("students", "calculate_average_grades", "reduce", student_statistics.calculate_average_grades, (students,)),
+        ("students", "calculate_average_grades", "numpy", student_statistics.calculate_average_grades_columnar, (student_columns,)),
+        ("students", "find_top_student", "reduce", student_statistics.find_top_student, (students,)),
+        ("students", "find_top_student", "numpy", student_statistics.find_top_student_columnar, (student_columns,)),
+        ("students", "find_top_student", "leaderboard", lambda rows: student_statistics.get_top_students(student_statistics.create_leaderboard(rows), 1), (students,)),
+        ("users", "filter_users_by_expense", "reduce", expenses.filter_users_by_expense, (users, 1400)),
+        ("users", "calculate_total_expenses", "reduce", expenses.calculate_total_expenses, (users,)),
+        ("users", "get_total_expenses_of_filtered_users", "reduce",
+         lambda rows: expenses.get_total_expenses_of_filtered_users(expenses.filter_users_by_expense(rows, 1400)), (users,)),
+        ("users", "get_total_expenses_of_filtered_users", "stream",
+         lambda rows: sum(map(lambda user: user["total_expense"], expenses.stream_filtered_total_expenses(rows, 1400))), (users,)),
+        ("orders", "filter_orders_by_customer_id x100", "reduce",
+         lambda rows: [orders.filter_orders_by_customer_id(rows, customer_id) for customer_id in customer_ids], (order_list,)),
+        ("orders", "filter_orders_by_customer_id x100", "index",
+         lambda store: [orders.get_orders_by_customer_id(store, customer_id) for customer_id in customer_ids], (order_store,)),
+        ("orders", "calculate_total_amount", "reduce", orders.calculate_total_amount, (order_list,)),
+        ("orders", "calculate_average_order_amount", "reduce", orders.calculate_average_order_amount, (order_list,)),
+        ("orders", "calculate_average_order_amount per customer", "group_by", orders.group_orders_by_customer, (order_list,)),
+    ]
+
+def run_benchmarks(sizes, seed=0):
+    print(f"{'rows':>10} {'function':<46} {'backend':<12} {'seconds':>10} {'rows/s':>14} {'peak MiB':>10}")
+    results = []
+    for size in sizes:
+        for dataset, function_name, backend, function, args in build_cases(size, seed):
+            elapsed, peak_memory = measure(function, *args)
+            results.append({
+                "dataset": dataset,
+                "rows": size,
+                "function": function_name,
+                "backend": backend,
+                "seconds": elapsed,
+                "peak_memory": peak_memory
+            })
+            print(f"{size:>10} {function_name:<46} {backend:<12} {elapsed:>10.4f} "
+                  f"{size / elapsed if elapsed else float('inf'):>14.0f} {peak_memory / 2 ** 20:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    max_power = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run_benchmarks([10 ** power for power in range(3, max_power + 1)])
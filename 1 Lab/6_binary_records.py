@@ -0,0 +1,154 @@
+import importlib
+import mmap
+import os
+import struct
+import tempfile
+from itertools import islice
+
+import numpy as np
+
+
+student_statistics = importlib.import_module("1_student_statistics")
+expenses = importlib.import_module("2_expenses")
+orders = importlib.import_module("3_orders")
+
+MAGIC = b"LAB1"
+VERSION = 2
+HEADER = struct.Struct("<4sHHHHQ12x")
+RECORD_TYPES = {"orders": 1, "expenses": 2, "grades": 3}
+WRITE_BATCH_SIZE = 65536
+MAX_FIELD_WIDTH = 65535
+VALUE_FIELDS = {"expenses": "expenses", "grades": "grades"}
+
+
+def make_record_dtype(record_type, value_width=0, name_width=1):
+    if record_type == "orders":
+        return np.dtype([("order_id", "<i8"), ("customer_id", "<i8"), ("amount", "<f8")])
+    if record_type == "expenses":
+        return np.dtype([("name", f"S{name_width}"), ("expenses", "<i8", (value_width,))])
+    if record_type == "grades":
+        return np.dtype([("name", f"S{name_width}"), ("age", "<i4"), ("grades", "<i8", (value_width,))])
+    raise ValueError(f"Unknown record type: {record_type}")
+
+def record_to_tuple(record_type, record, value_width, name_width):
+    if record_type == "orders":
+        return record["order_id"], record["customer_id"], record["amount"]
+
+    name = record["name"].encode("utf-8")
+    values = record[VALUE_FIELDS[record_type]]
+    if len(name) > name_width:
+        raise ValueError(f"Name {record['name']!r} takes {len(name)} bytes, name_width is {name_width}")
+    if len(values) != value_width:
+        raise ValueError(f"Record {record['name']!r} has {len(values)} {VALUE_FIELDS[record_type]}, "
+                         f"value_width is {value_width}")
+    if record_type == "expenses":
+        return name, values
+    return name, record["age"], values
+
+def measure_widths(record_type, records):
+    name_width = max((len(record["name"].encode("utf-8")) for record in records), default=0)
+    value_width = len(records[0][VALUE_FIELDS[record_type]]) if records else 0
+    return value_width, max(name_width, 1)
+
+def write_records(path, record_type, records, value_width=None, name_width=None):
+    if record_type not in RECORD_TYPES:
+        raise ValueError(f"Unknown record type: {record_type}")
+    if record_type != "orders" and (value_width is None or name_width is None):
+        records = list(records)
+        measured_value_width, measured_name_width = measure_widths(record_type, records)
+        value_width = measured_value_width if value_width is None else value_width
+        name_width = measured_name_width if name_width is None else name_width
+    value_width = value_width or 0
+    name_width = name_width or 1
+    if value_width > MAX_FIELD_WIDTH or name_width > MAX_FIELD_WIDTH:
+        raise ValueError(f"Field widths must not exceed {MAX_FIELD_WIDTH}")
+
+    dtype = make_record_dtype(record_type, value_width, name_width)
+    records = iter(records)
+    count = 0
+    with open(path, "wb") as file:
+        file.write(bytes(HEADER.size))
+        while batch := list(islice(records, WRITE_BATCH_SIZE)):
+            rows = [record_to_tuple(record_type, record, value_width, name_width) for record in batch]
+            file.write(np.array(rows, dtype=dtype).tobytes())
+            count += len(batch)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD_TYPES[record_type], value_width, name_width, count))
+    return count
+
+def open_records(path):
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, type_code, value_width, name_width, count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        raise ValueError(f"Unsupported record file: {path}")
+
+    record_type = next(name for name, code in RECORD_TYPES.items() if code == type_code)
+    view = memoryview(buffer)
+    return {
+        "mmap": buffer,
+        "view": view,
+        "record_type": record_type,
+        "records": np.frombuffer(view, dtype=make_record_dtype(record_type, value_width, name_width),
+                                 count=count, offset=HEADER.size)
+    }
+
+def decode_record(row):
+    record = {}
+    for field in row.dtype.names:
+        value = row[field]
+        record[field] = value.decode("utf-8") if isinstance(value, bytes) else value.tolist()
+    return record
+
+def iter_records(record_file):
+    return map(decode_record, record_file["records"])
+
+def close_records(record_file):
+    record_file["records"] = None
+    record_file["view"].release()
+    record_file["mmap"].close()
+
+def build_student_columns_from_records(records):
+    names, name_codes = np.unique(records["name"], return_inverse=True)
+    names = np.char.decode(names, "utf-8")
+    grade_counts = np.full(len(records), records["grades"].shape[1], dtype=np.int32)
+    return {
+        "names": names.astype(object),
+        "name_codes": name_codes.astype(np.int32),
+        "ages": records["age"],
+        "grades": records["grades"],
+        "grade_counts": grade_counts,
+        "average_grades": records["grades"].sum(axis=1) / grade_counts,
+    }
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as data_dir:
+        grades_path = os.path.join(data_dir, "grades.bin")
+        expenses_path = os.path.join(data_dir, "expenses.bin")
+        orders_path = os.path.join(data_dir, "orders.bin")
+        write_records(grades_path, "grades", student_statistics.students)
+        write_records(expenses_path, "expenses", expenses.users)
+        write_records(orders_path, "orders", orders.orders)
+
+        grades_file = open_records(grades_path)
+        expenses_file = open_records(expenses_path)
+        orders_file = open_records(orders_path)
+
+        filtered_students = student_statistics.filter_students_by_age(iter_records(grades_file), 23)
+        filtered_users = expenses.filter_users_by_expense(iter_records(expenses_file), 1400)
+        filtered_orders = orders.filter_orders_by_customer_id(iter_records(orders_file), 101)
+        student_columns = student_statistics.filter_student_columns_by_age(
+            build_student_columns_from_records(grades_file["records"]), 23)
+
+        print("Студент с самым высоким средним баллом:", student_statistics.find_top_student(filtered_students))
+        print("Студент с самым высоким средним баллом (NumPy):", student_statistics.find_top_student_columnar(student_columns))
+        print("Общая сумма расходов отфильтрованных пользователей:",
+              expenses.get_total_expenses_of_filtered_users(filtered_users))
+        print("Средняя стоимость заказов для клиента: ", orders.calculate_average_order_amount(filtered_orders))
+
+        del filtered_students, filtered_users, filtered_orders, student_columns
+        for record_file in (grades_file, expenses_file, orders_file):
+            close_records(record_file)
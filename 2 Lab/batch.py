@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+
+
+def read_source_list(path):
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+
+def words_to_json(words):
+    return [
+        dict(word=word, count=count, **({"error": error[0]} if error else {}))
+        for word, count, *error in words
+    ]
+
+def trending_to_json(trending):
+    return [{"term": term, "count": count, "score": score} for term, count, score in trending]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless VK/Reddit popular words analysis")
+    parser.add_argument("--vk", help="file with VK group ids, one per line")
+    parser.add_argument("--reddit", help="file with subreddit names, one per line")
+    parser.add_argument("--output", default="-", help="JSON output file, '-' for stdout")
+    parser.add_argument("--top", type=int, default=main.TOP_WORDS, help="number of top words per platform")
+    parser.add_argument("--posts", type=int, default=main.POSTS_PER_SOURCE, help="posts per source")
+    parser.add_argument("--approximate", action="store_true", help="count words with Space-Saving sketches")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk post cache")
+    parser.add_argument("--cache-dir", default="post_cache")
+    parser.add_argument("--workers", type=int, default=None, help="preprocessing processes")
+    parser.add_argument("--vk-url", help="VK API base URL, e.g. a local stub server; no token is needed")
+    parser.add_argument("--reddit-url", help="Reddit base URL, e.g. a local stub server; no credentials are needed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    vk_ids = [int(group_id) for group_id in read_source_list(args.vk)]
+    reddit_subreddits = read_source_list(args.reddit)
+
+    main.TOP_WORDS = args.top
+    main.POSTS_PER_SOURCE = args.posts
+    main.APPROXIMATE_ANALYSIS = args.approximate
+    main.USE_POST_CACHE = not args.no_cache
+    main.FETCH_OPTIONS = {
+        key: value for key, value in (("vk_url", args.vk_url), ("reddit_url", args.reddit_url)) if value
+    }
+    if main.USE_POST_CACHE:
+        main.post_cache = main.create_post_cache(args.cache_dir)
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=main.init_preprocess_worker) as executor:
+        main.preprocess_executor = executor
+        vk_words, reddit_words = main.analyze_sources(vk_ids, reddit_subreddits)
+
+    result = json.dumps({
+        "generated_at": started,
+        "elapsed": time.time() - started,
+        "vk": {
+            "sources": vk_ids,
+            "top_words": words_to_json(vk_words),
+            "trending": trending_to_json(main.get_trending_terms("vk"))
+        },
+        "reddit": {
+            "sources": reddit_subreddits,
+            "top_words": words_to_json(reddit_words),
+            "trending": trending_to_json(main.get_trending_terms("reddit"))
+        }
+    }, ensure_ascii=False, indent=2)
+
+    if args.output == "-":
+        print(result)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(result + "\n")
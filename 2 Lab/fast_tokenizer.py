@@ -0,0 +1,52 @@
+import re
+from collections import Counter
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+# word_tokenize still splits these after punctuation is stripped
+NLTK_CONTRACTIONS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na")
+}
+
+
+def tokenize(text):
+    tokens = PUNCTUATION_PATTERN.sub("", text).lower().split()
+    if NLTK_CONTRACTIONS.keys().isdisjoint(tokens):
+        return tokens
+    return [part for token in tokens for part in NLTK_CONTRACTIONS.get(token, (token,))]
+
+def create_vocabulary(stop_words=()):
+    vocabulary = {"ids": {}, "words": []}
+    for word in stop_words:
+        intern_token(vocabulary, word)
+    vocabulary["stop_word_count"] = len(vocabulary["words"])
+    return vocabulary
+
+def intern_token(vocabulary, token):
+    token_id = vocabulary["ids"].get(token)
+    if token_id is None:
+        token_id = vocabulary["ids"][token] = len(vocabulary["words"])
+        vocabulary["words"].append(token)
+    return token_id
+
+def iter_token_ids(text, vocabulary):
+    ids, stop_word_count = vocabulary["ids"], vocabulary["stop_word_count"]
+    for token in tokenize(text):
+        token_id = ids.get(token)
+        if token_id is None:
+            token_id = intern_token(vocabulary, token)
+        if token_id >= stop_word_count:
+            yield token_id
+
+def count_token_ids(texts, vocabulary, counter=None):
+    counter = Counter() if counter is None else counter
+    for text in texts:
+        counter.update(iter_token_ids(text, vocabulary))
+    return counter
+
+def most_common_words(counter, vocabulary, n=5):
+    return [(vocabulary["words"][token_id], count) for token_id, count in counter.most_common(n)]
@@ -0,0 +1,215 @@
+import asyncio
+import base64
+import json
+import random
+import time
+import urllib.parse
+import urllib.request
+
+VK_API_URL = "https://api.vk.com/method"
+VK_API_VERSION = "5.199"
+REDDIT_URL = "https://oauth.reddit.com"
+REDDIT_AUTH_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_TOKEN_MARGIN = 60
+USER_AGENT = "Functional programming lab 2"
+
+
+async def urllib_transport(url, params, headers=None, data=None):
+    request = urllib.request.Request(
+        f"{url}?{urllib.parse.urlencode(params)}" if params else url,
+        data=urllib.parse.urlencode(data).encode() if data is not None else None,
+        headers=headers or {}
+    )
+
+    def fetch():
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    return await asyncio.to_thread(fetch)
+
+
+def create_rate_limiter(rate, burst=1):
+    return {
+        "rate": rate,
+        "capacity": burst,
+        "tokens": burst,
+        "updated": time.monotonic(),
+        "lock": asyncio.Lock()
+    }
+
+async def acquire_rate_limit(limiter):
+    async with limiter["lock"]:
+        while True:
+            now = time.monotonic()
+            limiter["tokens"] = min(limiter["capacity"], limiter["tokens"] + (now - limiter["updated"]) * limiter["rate"])
+            limiter["updated"] = now
+            if limiter["tokens"] >= 1:
+                limiter["tokens"] -= 1
+                return
+            await asyncio.sleep((1 - limiter["tokens"]) / limiter["rate"])
+
+
+def create_fetch_engine(transport=urllib_transport, vk_token=None, max_concurrency=8,
+                        vk_rate=3, reddit_rate=1, retries=3, backoff=0.5,
+                        vk_url=VK_API_URL, reddit_url=REDDIT_URL, reddit_app_id=None, reddit_app_secret=None,
+                        reddit_auth_url=REDDIT_AUTH_URL):
+    return {
+        "transport": transport,
+        "vk_token": vk_token,
+        "reddit_app_id": reddit_app_id,
+        "reddit_app_secret": reddit_app_secret,
+        "reddit_auth_url": reddit_auth_url,
+        "reddit_token": None,
+        "reddit_token_lock": asyncio.Lock(),
+        "semaphore": asyncio.Semaphore(max_concurrency),
+        "rate_limiters": {
+            "vk": create_rate_limiter(vk_rate),
+            "reddit": create_rate_limiter(reddit_rate)
+        },
+        "retries": retries,
+        "backoff": backoff,
+        "vk_url": vk_url,
+        "reddit_url": reddit_url
+    }
+
+async def request_page(engine, api, url, params, headers=None, data=None):
+    for attempt in range(engine["retries"] + 1):
+        await acquire_rate_limit(engine["rate_limiters"][api])
+        try:
+            async with engine["semaphore"]:
+                if data is None:
+                    page = await engine["transport"](url, params, headers)
+                else:
+                    page = await engine["transport"](url, params, headers, data)
+            if "error" in page:
+                raise RuntimeError(f"{api} API error: {page['error']}")
+            return page
+        except Exception:
+            if attempt == engine["retries"]:
+                raise
+            await asyncio.sleep(engine["backoff"] * 2 ** attempt * (1 + random.random()))
+
+
+async def get_reddit_headers(engine):
+    headers = {"User-Agent": USER_AGENT}
+    if not engine["reddit_app_id"]:
+        return headers
+
+    async with engine["reddit_token_lock"]:
+        token = engine["reddit_token"]
+        if token is None or token["expires"] <= time.monotonic():
+            credentials = base64.b64encode(f"{engine['reddit_app_id']}:{engine['reddit_app_secret']}".encode())
+            response = await request_page(engine, "reddit", engine["reddit_auth_url"], {}, {
+                "User-Agent": USER_AGENT,
+                "Authorization": f"Basic {credentials.decode()}"
+            }, {"grant_type": "client_credentials"})
+            token = engine["reddit_token"] = {
+                "value": response["access_token"],
+                "expires": time.monotonic() + response.get("expires_in", 3600) - REDDIT_TOKEN_MARGIN
+            }
+    headers["Authorization"] = f"bearer {token['value']}"
+    return headers
+
+
+async def iter_vk_posts(engine, group_id, limit=1000, page_size=100, since_id=None):
+    offset = 0
+    while offset < limit:
+        page = await request_page(engine, "vk", f"{engine['vk_url']}/wall.get", {
+            "owner_id": -group_id,
+            "count": min(page_size, limit - offset),
+            "offset": offset,
+            "access_token": engine["vk_token"],
+            "v": VK_API_VERSION
+        })
+        items = page["response"]["items"]
+        for post in items:
+            if since_id is not None and post["id"] <= since_id:
+                if post.get("is_pinned"):
+                    continue
+                return
+            if "text" in post:
+                yield {"id": post["id"], "date": post["date"], "text": post["text"]}
+
+        offset += len(items)
+        if not items or offset >= page["response"]["count"]:
+            return
+
+async def iter_reddit_posts(engine, subreddit_name, limit=1000, page_size=100, listing="hot", since_date=None):
+    after = None
+    fetched = 0
+    while fetched < limit:
+        params = {"limit": min(page_size, limit - fetched), "raw_json": 1}
+        if after:
+            params["after"] = after
+        page = await request_page(engine, "reddit", f"{engine['reddit_url']}/r/{subreddit_name}/{listing}.json",
+                                  params, await get_reddit_headers(engine))
+        children = page["data"]["children"]
+        for child in children:
+            post = child["data"]
+            if since_date is not None and post["created_utc"] < since_date:
+                return
+            yield {"id": post["name"], "date": post["created_utc"], "text": post["selftext"]}
+
+        fetched += len(children)
+        after = page["data"].get("after")
+        if not children or not after:
+            return
+
+
+async def stream_posts(engine, sources, failures=None):
+    results = asyncio.Queue()
+
+    async def pump(source, posts):
+        try:
+            async for post in posts:
+                await results.put((source, post))
+        except Exception as e:
+            print(f"Error fetching {source[0]} posts from {source[1]}: {e}")
+            if failures is not None:
+                failures[source] = e
+        finally:
+            await results.put((source, None))
+
+    tasks = [asyncio.create_task(pump(source, posts)) for source, posts in sources]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            source, post = await results.get()
+            if post is None:
+                remaining -= 1
+            else:
+                yield source, post
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def build_sources(engine, vk_ids=(), reddit_subreddits=(), limit=1000):
+    return (
+        [(("vk", group_id), iter_vk_posts(engine, group_id, limit)) for group_id in vk_ids] +
+        [(("reddit", name), iter_reddit_posts(engine, name, limit)) for name in reddit_subreddits]
+    )
+
+async def fetch_all_posts(engine, vk_ids=(), reddit_subreddits=(), limit=1000):
+    posts_by_source = {("vk", group_id): [] for group_id in vk_ids}
+    posts_by_source.update({("reddit", name): [] for name in reddit_subreddits})
+    async for source, post in stream_posts(engine, build_sources(engine, vk_ids, reddit_subreddits, limit)):
+        posts_by_source[source].append(post)
+    return posts_by_source
+
+def build_incremental_sources(engine, watermarks, limit=1000):
+    sources = []
+    for source, watermark in watermarks.items():
+        kind, name = source
+        if kind == "vk":
+            posts = iter_vk_posts(engine, name, limit, since_id=watermark["id"] if watermark else None)
+        else:
+            posts = iter_reddit_posts(engine, name, limit, listing="new", since_date=watermark["date"] if watermark else None)
+        sources.append((source, posts))
+    return sources
+
+async def fetch_new_posts(engine, watermarks, limit=1000):
+    posts_by_source = {source: [] for source in watermarks}
+    failures = {}
+    async for source, post in stream_posts(engine, build_incremental_sources(engine, watermarks, limit), failures):
+        posts_by_source[source].append(post)
+    return posts_by_source, failures
@@ -1,36 +1,80 @@
+import asyncio
+import queue
 import re
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from collections import Counter
-import tkinter as tk
-from tkinter import scrolledtext
+from functools import reduce
+from itertools import chain
 
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import vk_api
-import praw
+from fast_tokenizer import tokenize, create_vocabulary, count_token_ids, most_common_words
+from fetch_engine import create_fetch_engine, fetch_all_posts, fetch_new_posts
+from post_cache import (create_post_cache, load_cache_entry, save_cache_entry, needs_refresh,
+                        get_watermark, merge_cache_entry)
+from space_saving import create_sketch, update_sketch_many, merge_sketches, most_common_with_errors
+from trends import create_trends, ingest_post, trending_terms
 
-from my_token import VK_TOKEN, REDDIT_APP_ID, REDDIT_APP_SECRET
+APPROXIMATE_ANALYSIS = False
+SKETCH_CAPACITY = 1000
+PREPROCESS_BATCH_SIZE = 500
+ASYNC_FETCH = True
+POSTS_PER_SOURCE = 500
+USE_POST_CACHE = True
+FAST_TOKENIZER = True
+TOP_WORDS = 5
+FETCH_OPTIONS = {}
 
-# import nltk
-# nltk.download('stopwords')
-# nltk.download('punkt_tab')
-stop_words = set(stopwords.words('russian'))
+preprocess_executor = None
+post_cache = None
+analysis_results = queue.Queue()
+trends_by_platform = {"vk": create_trends(), "reddit": create_trends()}
+trend_watermarks = {}
 
-# VK access
-token = VK_TOKEN
-vk_session = vk_api.VkApi(token=token)
-vk = vk_session.get_api()
+stop_words = None
+vk = None
+reddit = None
 
-# Reddit access
-reddit = praw.Reddit(
-    client_id=REDDIT_APP_ID,
-    client_secret=REDDIT_APP_SECRET,
-    user_agent='Functional programming lab 2'
-)
+def get_stop_words():
+    global stop_words
+    if stop_words is None:
+        # import nltk
+        # nltk.download('stopwords')
+        # nltk.download('punkt_tab')
+        from nltk.corpus import stopwords
+        stop_words = frozenset(stopwords.words('russian'))
+    return stop_words
+
+def get_vk_token():
+    from my_token import VK_TOKEN
+    return VK_TOKEN
+
+def get_vk():
+    global vk
+    if vk is None:
+        import vk_api
+        vk_session = vk_api.VkApi(token=get_vk_token())
+        vk = vk_session.get_api()
+    return vk
+
+def get_reddit_credentials():
+    from my_token import REDDIT_APP_ID, REDDIT_APP_SECRET
+    return REDDIT_APP_ID, REDDIT_APP_SECRET
+
+def get_reddit():
+    global reddit
+    if reddit is None:
+        import praw
+        reddit_app_id, reddit_app_secret = get_reddit_credentials()
+        reddit = praw.Reddit(
+            client_id=reddit_app_id,
+            client_secret=reddit_app_secret,
+            user_agent='Functional programming lab 2'
+        )
+    return reddit
 
 def fetch_vk_posts(group_id, count=100):
     try:
-        posts = vk.wall.get(owner_id=-group_id, count=count)
+        posts = get_vk().wall.get(owner_id=-group_id, count=count)
         return [post['text'] for post in posts['items'] if 'text' in post]
     except Exception as e:
         print(f"Error fetching vk posts: {e}")
@@ -38,70 +82,243 @@ def fetch_vk_posts(group_id, count=100):
 
 def fetch_reddit_posts(subreddit_name, count=100):
     try:
-        subreddit = reddit.subreddit(subreddit_name)
+        subreddit = get_reddit().subreddit(subreddit_name)
         posts = subreddit.hot(limit=count)
         return [post.selftext for post in posts]
     except Exception as e:
         print(f"Error fetching reddit posts: {e}")
         return []
 
+def get_fetch_credentials(vk_ids, reddit_subreddits):
+    credentials = {}
+    if vk_ids and "vk_url" not in FETCH_OPTIONS:
+        credentials["vk_token"] = get_vk_token()
+    if reddit_subreddits and "reddit_url" not in FETCH_OPTIONS:
+        credentials["reddit_app_id"], credentials["reddit_app_secret"] = get_reddit_credentials()
+    return credentials
+
+async def fetch_posts_async(vk_ids, reddit_subreddits):
+    engine = create_fetch_engine(**get_fetch_credentials(vk_ids, reddit_subreddits), **FETCH_OPTIONS)
+    posts_by_source = await fetch_all_posts(engine, vk_ids, reddit_subreddits, POSTS_PER_SOURCE)
+    vk_posts = [[post["text"] for post in posts_by_source[("vk", group_id)]] for group_id in vk_ids]
+    reddit_posts = [[post["text"] for post in posts_by_source[("reddit", name)]] for name in reddit_subreddits]
+    return vk_posts, reddit_posts
+
+async def fetch_new_posts_async(watermarks):
+    engine = create_fetch_engine(**get_fetch_credentials(
+        [name for kind, name in watermarks if kind == "vk"],
+        [name for kind, name in watermarks if kind == "reddit"]
+    ), **FETCH_OPTIONS)
+    return await fetch_new_posts(engine, watermarks, POSTS_PER_SOURCE)
+
 def preprocess_text(text):
+    if FAST_TOKENIZER:
+        return " ".join([t for t in tokenize(text) if t not in get_stop_words()])
+    from nltk.tokenize import word_tokenize
     text = re.sub(r'[^\w\s]', '', text)
     tokens = word_tokenize(text.lower())
-    return " ".join([t for t in tokens if t not in stop_words])
+    return " ".join([t for t in tokens if t not in get_stop_words()])
 
 def analyze_texts(texts):
     words_counter = Counter()
     for text in texts:
         words = text.split()
         words_counter.update(words)
-    return words_counter.most_common(5)
+    return words_counter.most_common(TOP_WORDS)
+
+def analyze_texts_fast(texts):
+    vocabulary = create_vocabulary(get_stop_words())
+    return most_common_words(count_token_ids(texts, vocabulary), vocabulary, TOP_WORDS)
+
+def build_words_sketch(texts, capacity=SKETCH_CAPACITY):
+    sketch = create_sketch(capacity)
+    for text in texts:
+        update_sketch_many(sketch, text.split())
+    return sketch
+
+def analyze_texts_approximate(texts_by_source, capacity=SKETCH_CAPACITY):
+    sketches = [build_words_sketch(texts, capacity) for texts in texts_by_source]
+    return most_common_with_errors(reduce(merge_sketches, sketches, create_sketch(capacity)), TOP_WORDS)
+
+def init_preprocess_worker():
+    get_stop_words()
+
+def preprocess_batch(texts):
+    return [preprocess_text(text) for text in texts]
+
+def count_batch_words(texts):
+    batch_stop_words = get_stop_words()
+    return Counter(token for text in texts for token in tokenize(text) if token not in batch_stop_words)
+
+def iter_preprocessed_batches(posts_by_source, executor, batch_size=PREPROCESS_BATCH_SIZE, task=preprocess_batch):
+    futures = [
+        (source_index, executor.submit(task, posts[start:start + batch_size]))
+        for source_index, posts in enumerate(posts_by_source)
+        for start in range(0, len(posts), batch_size)
+    ]
+    for source_index, future in futures:
+        yield source_index, future.result()
+
+def analyze_posts(posts_by_source, executor):
+    if FAST_TOKENIZER and not APPROXIMATE_ANALYSIS:
+        if executor is None:
+            return analyze_texts_fast(chain.from_iterable(posts_by_source))
+        words_counter = Counter()
+        for _, batch_counts in iter_preprocessed_batches(posts_by_source, executor, task=count_batch_words):
+            words_counter.update(batch_counts)
+        return words_counter.most_common(TOP_WORDS)
+
+    processed_batches = iter_preprocessed_batches(posts_by_source, executor)
+
+    if APPROXIMATE_ANALYSIS:
+        sketches = [create_sketch(SKETCH_CAPACITY) for _ in posts_by_source]
+        for source_index, texts in processed_batches:
+            for text in texts:
+                update_sketch_many(sketches[source_index], text.split())
+        return most_common_with_errors(reduce(merge_sketches, sketches, create_sketch(SKETCH_CAPACITY)), TOP_WORDS)
+
+    words_counter = Counter()
+    for _, texts in processed_batches:
+        for text in texts:
+            words_counter.update(text.split())
+    return words_counter.most_common(TOP_WORDS)
+
+def load_cached_texts(sources):
+    entries = {source: load_cache_entry(post_cache, source) for source in sources}
+    stale_sources = [source for source, entry in entries.items() if needs_refresh(post_cache, entry)]
+
+    if stale_sources:
+        new_posts, failures = asyncio.run(
+            fetch_new_posts_async({source: get_watermark(entries[source]) for source in stale_sources}))
+        stale_sources = [source for source in stale_sources if source not in failures]
+        tokens_by_source = [[] for _ in stale_sources]
+        for source_index, texts in iter_preprocessed_batches(
+                [[post["text"] for post in new_posts[source]] for source in stale_sources], preprocess_executor):
+            tokens_by_source[source_index].extend(texts)
+
+        for source, tokens in zip(stale_sources, tokens_by_source):
+            posts = [dict(post, tokens=post_tokens) for post, post_tokens in zip(new_posts[source], tokens)]
+            entries[source] = merge_cache_entry(entries[source], posts, POSTS_PER_SOURCE)
+            save_cache_entry(post_cache, source, entries[source])
+
+    update_trends(entries)
+    return {source: [post["tokens"] for post in entry["posts"]] if entry else [] for source, entry in entries.items()}
+
+def update_trends(entries):
+    for source, entry in entries.items():
+        if entry is None:
+            continue
+        watermark = trend_watermarks.get(source)
+        new_posts = [post for post in entry["posts"] if is_after_trend_watermark(post, watermark)]
+        for post in sorted(new_posts, key=lambda post: post["date"]):
+            ingest_post(trends_by_platform[source[0]], post["date"], post["tokens"].split())
+        if new_posts:
+            latest = max(post["date"] for post in new_posts)
+            latest_ids = {post["id"] for post in new_posts if post["date"] == latest}
+            if watermark and watermark["date"] == latest:
+                latest_ids |= watermark["ids"]
+            trend_watermarks[source] = {"date": latest, "ids": latest_ids}
+
+def is_after_trend_watermark(post, watermark):
+    if watermark is None or post["date"] > watermark["date"]:
+        return True
+    return post["date"] == watermark["date"] and post["id"] not in watermark["ids"]
+
+def get_trending_terms(platform):
+    return trending_terms(trends_by_platform[platform], TOP_WORDS)
+
+def analyze_processed_texts(texts_by_source):
+    if APPROXIMATE_ANALYSIS:
+        return analyze_texts_approximate(texts_by_source)
+    return analyze_texts(chain.from_iterable(texts_by_source))
+
+def analyze_sources(vk_ids, reddit_subreddits):
+    if USE_POST_CACHE:
+        vk_sources = [("vk", group_id) for group_id in vk_ids]
+        reddit_sources = [("reddit", name) for name in reddit_subreddits]
+        texts_by_source = load_cached_texts(vk_sources + reddit_sources)
+
+        vk_words = analyze_processed_texts([texts_by_source[source] for source in vk_sources])
+        reddit_words = analyze_processed_texts([texts_by_source[source] for source in reddit_sources])
+        return vk_words, reddit_words
+
+    if ASYNC_FETCH:
+        vk_posts, reddit_posts = asyncio.run(fetch_posts_async(vk_ids, reddit_subreddits))
+    else:
+        with ThreadPoolExecutor(max_workers=None) as executor:
+            vk_posts = list(executor.map(fetch_vk_posts, vk_ids))
+            reddit_posts = list(executor.map(fetch_reddit_posts, reddit_subreddits))
+
+    return analyze_posts(vk_posts, preprocess_executor), analyze_posts(reddit_posts, preprocess_executor)
+
+def analyze_sources_in_background(vk_ids, reddit_subreddits):
+    try:
+        vk_words, reddit_words = analyze_sources(vk_ids, reddit_subreddits)
+        analysis_results.put((vk_words, reddit_words, get_trending_terms("vk"), get_trending_terms("reddit")))
+    except Exception as e:
+        print(f"Error analyzing posts: {e}")
+        analysis_results.put(([], [], [], []))
 
 def run_analysis():
     vk_ids = [int(id.strip()) for id in vk_input.get("1.0", tk.END).splitlines() if id.strip()]
     reddit_subreddits = [sub.strip() for sub in reddit_input.get("1.0", tk.END).splitlines() if sub.strip()]
 
-    with ThreadPoolExecutor(max_workers=None) as executor:
-        vk_posts = list(executor.map(fetch_vk_posts, vk_ids))
-        reddit_posts = list(executor.map(fetch_reddit_posts, reddit_subreddits))
+    analyze_button.configure(state='disabled')
+    threading.Thread(target=analyze_sources_in_background, args=(vk_ids, reddit_subreddits), daemon=True).start()
+    root.after(100, show_analysis_results)
 
-        vk_processed_texts = [preprocess_text(post) for posts in vk_posts for post in posts]
-        reddit_processed_texts = [preprocess_text(post) for posts in reddit_posts for post in posts]
-
-        vk_words = analyze_texts(vk_processed_texts)
-        reddit_words = analyze_texts(reddit_processed_texts)
+def show_analysis_results():
+    try:
+        vk_words, reddit_words, vk_trending, reddit_trending = analysis_results.get_nowait()
+    except queue.Empty:
+        root.after(100, show_analysis_results)
+        return
 
-        display_results(vk_output, vk_words)
-        display_results(reddit_output, reddit_words)
+    display_results(vk_output, vk_words, vk_trending)
+    display_results(reddit_output, reddit_words, reddit_trending)
+    analyze_button.configure(state='normal')
 
-def display_results(output_widget, words):
+def display_results(output_widget, words, trending=()):
     output_widget.configure(state='normal')
     output_widget.delete("1.0", tk.END)
-    output_widget.insert(tk.END, "Топ 5 слов:\n")
-    for word, count in words:
-        output_widget.insert(tk.END, f"{word}: {count}\n")
+    output_widget.insert(tk.END, f"Топ {TOP_WORDS} слов:\n")
+    for word, count, *error in words:
+        output_widget.insert(tk.END, f"{word}: {count} (±{error[0]})\n" if error else f"{word}: {count}\n")
+    if trending:
+        output_widget.insert(tk.END, "\nРастущие темы:\n")
+        for term, count, score in trending:
+            output_widget.insert(tk.END, f"{term}: {count} (x{score:.1f})\n")
     output_widget.configure(state='disabled')
 
-root = tk.Tk()
-root.title("Анализ популярных тем в ВК и Reddit")
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import scrolledtext
+
+    preprocess_executor = ProcessPoolExecutor(initializer=init_preprocess_worker)
+    post_cache = create_post_cache()
+
+    root = tk.Tk()
+    root.title("Анализ популярных тем в ВК и Reddit")
+
+    tk.Label(root, text="Введите ID групп ВК:").grid(row=0, column=0)
+    vk_input = scrolledtext.ScrolledText(root, width=30, height=10)
+    vk_input.grid(row=1, column=0)
 
-tk.Label(root, text="Введите ID групп ВК:").grid(row=0, column=0)
-vk_input = scrolledtext.ScrolledText(root, width=30, height=10)
-vk_input.grid(row=1, column=0)
+    tk.Label(root, text="Введите субреддиты Reddit:").grid(row=0, column=1)
+    reddit_input = scrolledtext.ScrolledText(root, width=30, height=10)
+    reddit_input.grid(row=1, column=1)
 
-tk.Label(root, text="Введите субреддиты Reddit:").grid(row=0, column=1)
-reddit_input = scrolledtext.ScrolledText(root, width=30, height=10)
-reddit_input.grid(row=1, column=1)
+    analyze_button = tk.Button(root, text="Запустить анализ", command=run_analysis)
+    analyze_button.grid(row=2, column=0, columnspan=2)
 
-analyze_button = tk.Button(root, text="Запустить анализ", command=run_analysis)
-analyze_button.grid(row=2, column=0, columnspan=2)
+    tk.Label(root, text="Результаты для ВК:").grid(row=3, column=0)
+    vk_output = scrolledtext.ScrolledText(root, width=30, height=10, state='disabled')
+    vk_output.grid(row=4, column=0)
 
-tk.Label(root, text="Результаты для ВК:").grid(row=3, column=0)
-vk_output = scrolledtext.ScrolledText(root, width=30, height=10, state='disabled')
-vk_output.grid(row=4, column=0)
+    tk.Label(root, text="Результаты для Reddit:").grid(row=3, column=1)
+    reddit_output = scrolledtext.ScrolledText(root, width=30, height=10, state='disabled')
+    reddit_output.grid(row=4, column=1)
 
-tk.Label(root, text="Результаты для Reddit:").grid(row=3, column=1)
-reddit_output = scrolledtext.ScrolledText(root, width=30, height=10, state='disabled')
-reddit_output.grid(row=4, column=1)
+    root.mainloop()
 
-root.mainloop()
\ No newline at end of file
+    preprocess_executor.shutdown(cancel_futures=True)
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+import urllib.parse
+
+CACHE_DIR = "post_cache"
+CACHE_TTL = 24 * 60 * 60
+REFRESH_INTERVAL = 5 * 60
+
+
+def create_post_cache(directory=CACHE_DIR, ttl=CACHE_TTL, refresh_interval=REFRESH_INTERVAL):
+    os.makedirs(directory, exist_ok=True)
+    return {
+        "directory": directory,
+        "ttl": ttl,
+        "refresh_interval": refresh_interval
+    }
+
+def cache_path(cache, source):
+    kind, name = source
+    return os.path.join(cache["directory"], f"{kind}_{urllib.parse.quote(str(name), safe='')}.json")
+
+def load_cache_entry(cache, source, now=None):
+    now = now or time.time()
+    path = cache_path(cache, source)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if now - entry["created_at"] > cache["ttl"]:
+        os.remove(path)
+        return None
+    return entry
+
+def save_cache_entry(cache, source, entry):
+    path = cache_path(cache, source)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(entry, file, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def needs_refresh(cache, entry, now=None):
+    return entry is None or (now or time.time()) - entry["fetched_at"] > cache["refresh_interval"]
+
+def get_watermark(entry):
+    return entry["watermark"] if entry else None
+
+def merge_cache_entry(entry, new_posts, limit, now=None):
+    now = now or time.time()
+    seen_ids = set()
+    posts = []
+    for post in new_posts + (entry["posts"] if entry else []):
+        if post["id"] not in seen_ids:
+            seen_ids.add(post["id"])
+            posts.append(post)
+    posts = sorted(posts, key=lambda post: post["date"], reverse=True)[:limit]
+
+    return {
+        "created_at": entry["created_at"] if entry else now,
+        "fetched_at": now,
+        "watermark": {
+            "id": max((post["id"] for post in posts), default=None),
+            "date": max((post["date"] for post in posts), default=None)
+        } if posts else get_watermark(entry),
+        "posts": posts
+    }
@@ -0,0 +1,81 @@
+import heapq
+import math
+
+
+def create_sketch(capacity=None, error=None):
+    if capacity is None:
+        capacity = math.ceil(1 / error) if error else 1000
+    return {
+        "capacity": capacity,
+        "counts": {},
+        "errors": {},
+        "heap": [],
+        "total": 0
+    }
+
+def rebuild_heap(sketch):
+    sketch["heap"] = [(count, word) for word, count in sketch["counts"].items()]
+    heapq.heapify(sketch["heap"])
+
+def pop_min_word(sketch):
+    heap, counts = sketch["heap"], sketch["counts"]
+    while True:
+        count, word = heapq.heappop(heap)
+        if counts.get(word) == count:
+            return word, count
+
+def update_sketch(sketch, word, count=1):
+    counts, errors = sketch["counts"], sketch["errors"]
+    sketch["total"] += count
+
+    if word in counts:
+        counts[word] += count
+    elif len(counts) < sketch["capacity"]:
+        counts[word] = count
+        errors[word] = 0
+    else:
+        min_word, min_count = pop_min_word(sketch)
+        del counts[min_word], errors[min_word]
+        counts[word] = min_count + count
+        errors[word] = min_count
+
+    heapq.heappush(sketch["heap"], (counts[word], word))
+    if len(sketch["heap"]) > 4 * sketch["capacity"]:
+        rebuild_heap(sketch)
+
+def update_sketch_many(sketch, words):
+    for word in words:
+        update_sketch(sketch, word)
+    return sketch
+
+def min_count(sketch):
+    if len(sketch["counts"]) < sketch["capacity"]:
+        return 0
+    return min(sketch["counts"].values())
+
+def merge_sketches(first, second, capacity=None):
+    first_min, second_min = min_count(first), min_count(second)
+    merged = create_sketch(capacity or max(first["capacity"], second["capacity"]))
+
+    candidates = [
+        (
+            first["counts"].get(word, first_min) + second["counts"].get(word, second_min),
+            first["errors"].get(word, first_min) + second["errors"].get(word, second_min),
+            word
+        )
+        for word in first["counts"].keys() | second["counts"].keys()
+    ]
+    for count, error, word in heapq.nlargest(merged["capacity"], candidates):
+        merged["counts"][word] = count
+        merged["errors"][word] = error
+
+    merged["total"] = first["total"] + second["total"]
+    rebuild_heap(merged)
+    return merged
+
+def most_common_with_errors(sketch, k):
+    top_words = heapq.nlargest(k, sketch["counts"].items(), key=lambda item: item[1])
+    return [(word, count, sketch["errors"][word]) for word, count in top_words]
+
+def error_bound(sketch):
+    return sketch["total"] / sketch["capacity"]
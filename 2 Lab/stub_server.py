@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetch_engine import create_fetch_engine, fetch_all_posts
+
+STUB_POST_COUNT = 250
+STUB_REDDIT_TOKEN = "stub-token"
+
+
+def make_canned_posts(prefix, count=STUB_POST_COUNT):
+    return [
+        {"id": count - index, "date": 1700000000 + count - index, "text": f"{prefix} пост номер {count - index}"}
+        for index in range(count)
+    ]
+
+def vk_page(params):
+    posts = make_canned_posts(f"vk{params.get('owner_id', '')}")
+    offset, count = int(params.get("offset", 0)), int(params.get("count", 100))
+    return {"response": {"count": len(posts), "items": posts[offset:offset + count]}}
+
+def reddit_page(subreddit_name, params):
+    posts = make_canned_posts(f"r/{subreddit_name}")
+    start = int(params["after"][3:]) if "after" in params else 0
+    page = posts[start:start + int(params.get("limit", 100))]
+    end = start + len(page)
+    return {"data": {
+        "children": [
+            {"data": {"name": f"t3_{post['id']}", "created_utc": post["date"], "selftext": post["text"]}}
+            for post in page
+        ],
+        "after": f"t3_{end}" if end < len(posts) else None
+    }}
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        parts = url.path.strip("/").split("/")
+
+        if parts[:2] == ["vk", "wall.get"]:
+            body = vk_page(params)
+        elif parts[0] == "reddit" and len(parts) == 4 and parts[1] == "r":
+            authorization = self.headers.get("Authorization")
+            if authorization is not None and authorization != f"bearer {STUB_REDDIT_TOKEN}":
+                self.send_error(401)
+                return
+            body = reddit_page(parts[2], params)
+        else:
+            self.send_error(404)
+            return
+        self.send_json(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urllib.parse.urlparse(self.path).path != "/reddit/api/v1/access_token":
+            self.send_error(404)
+            return
+        self.send_json({"access_token": STUB_REDDIT_TOKEN, "token_type": "bearer", "expires_in": 3600})
+
+    def send_json(self, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), StubApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def check_engine(base_url):
+    engine = create_fetch_engine(vk_token="stub", vk_rate=100, reddit_rate=100,
+                                 vk_url=f"{base_url}/vk", reddit_url=f"{base_url}/reddit",
+                                 reddit_app_id="stub", reddit_app_secret="stub",
+                                 reddit_auth_url=f"{base_url}/reddit/api/v1/access_token")
+    return await fetch_all_posts(engine, [1, 2], ["python"], limit=STUB_POST_COUNT)
+
+
+if __name__ == "__main__":
+    server = start_stub_server()
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    print(f"Stub API works on {base_url}")
+
+    for source, posts in asyncio.run(check_engine(base_url)).items():
+        print(f"{source[0]} {source[1]}: {len(posts)} posts")
+
+    server.shutdown()
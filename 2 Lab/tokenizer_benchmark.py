@@ -0,0 +1,54 @@
+import random
+import sys
+import time
+
+import main
+
+RUSSIAN_SAMPLE = [
+    "Сегодня в городе прошёл фестиваль уличной еды, и тысячи людей пришли попробовать новые блюда!",
+    "Учёные представили новую модель нейросети — она пишет код быстрее, чем опытные программисты.",
+    "Не могу поверить, что лето уже закончилось... Кто-нибудь знает хорошие курсы по Python?",
+    "Матч закончился со счётом 2:1, болельщики были в восторге от игры нашей команды.",
+    "Городские власти обещают отремонтировать дороги к осени, но жители в это не верят."
+]
+ENGLISH_SAMPLE = [
+    "I cannot believe the new release is finally out - it's gonna change everything!",
+    "Anyone wanna review my pull request? The tests pass locally, but CI keeps failing.",
+    "Python 3.13 ships a new REPL, better error messages, and an experimental JIT.",
+    "Lemme know if you've got ideas for the weekend hackathon; we gotta pick a theme.",
+    "The city council promised to fix the roads by autumn, but nobody believes them."
+]
+
+
+def generate_posts(sample, count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(sample, k=rng.randint(1, 4))) for _ in range(count)]
+
+def nltk_top_words(texts):
+    main.FAST_TOKENIZER = False
+    try:
+        return main.analyze_texts([main.preprocess_text(text) for text in texts])
+    finally:
+        main.FAST_TOKENIZER = True
+
+def fast_top_words(texts):
+    return main.analyze_texts_fast(texts)
+
+def measure(function, texts):
+    started = time.perf_counter()
+    result = function(texts)
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for language, sample in (("russian", RUSSIAN_SAMPLE), ("english", ENGLISH_SAMPLE)):
+        posts = generate_posts(sample, post_count)
+        nltk_words, nltk_time = measure(nltk_top_words, posts)
+        fast_words, fast_time = measure(fast_top_words, posts)
+
+        print(f"{language}: {post_count} posts")
+        print(f"  nltk: {nltk_time:.3f} s ({post_count / nltk_time:.0f} posts/s) {nltk_words}")
+        print(f"  fast: {fast_time:.3f} s ({post_count / fast_time:.0f} posts/s) {fast_words}")
+        print(f"  speedup: {nltk_time / fast_time:.1f}x, identical top words: {nltk_words == fast_words}")
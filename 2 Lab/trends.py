@@ -0,0 +1,81 @@
+import time
+from collections import Counter
+
+BUCKET_SECONDS = 60 * 60
+WINDOW_BUCKETS = 6
+BASELINE_BUCKETS = 48
+KINDS = ("unigrams", "bigrams")
+
+
+def create_trends(bucket_seconds=BUCKET_SECONDS, window_buckets=WINDOW_BUCKETS, baseline_buckets=BASELINE_BUCKETS):
+    return {
+        "bucket_seconds": bucket_seconds,
+        "window_buckets": window_buckets,
+        "baseline_buckets": baseline_buckets,
+        "head": None,
+        "buckets": {},
+        "recent": {kind: Counter() for kind in KINDS},
+        "baseline": {kind: Counter() for kind in KINDS}
+    }
+
+def add_counts(total, counts, sign=1):
+    for term, count in counts.items():
+        total[term] += sign * count
+        if total[term] <= 0:
+            del total[term]
+
+def bucket_region(trends, index):
+    if index > trends["head"] - trends["window_buckets"]:
+        return "recent"
+    if index > trends["head"] - trends["window_buckets"] - trends["baseline_buckets"]:
+        return "baseline"
+    return None
+
+def advance_trends(trends, timestamp):
+    head = int(timestamp // trends["bucket_seconds"])
+    if trends["head"] is not None and head <= trends["head"]:
+        return
+
+    old_regions = {index: bucket_region(trends, index) for index in trends["buckets"]} if trends["head"] is not None else {}
+    trends["head"] = head
+    for index, old_region in old_regions.items():
+        new_region = bucket_region(trends, index)
+        if new_region == old_region:
+            continue
+        bucket = trends["buckets"][index]
+        for kind in KINDS:
+            add_counts(trends[old_region][kind], bucket[kind], -1)
+            if new_region:
+                add_counts(trends[new_region][kind], bucket[kind])
+        if new_region is None:
+            del trends["buckets"][index]
+
+def ingest_post(trends, timestamp, tokens):
+    advance_trends(trends, timestamp)
+    index = int(timestamp // trends["bucket_seconds"])
+    region = bucket_region(trends, index)
+    if region is None:
+        return
+
+    counts = {"unigrams": Counter(tokens), "bigrams": Counter(map(" ".join, zip(tokens, tokens[1:])))}
+    bucket = trends["buckets"].setdefault(index, {kind: Counter() for kind in KINDS})
+    for kind in KINDS:
+        add_counts(bucket[kind], counts[kind])
+        add_counts(trends[region][kind], counts[kind])
+
+def window_counts(trends, kind="unigrams", now=None):
+    advance_trends(trends, now or time.time())
+    return trends["recent"][kind]
+
+def trending_terms(trends, n=10, min_count=3, smoothing=1.0, kinds=KINDS, now=None):
+    advance_trends(trends, now or time.time())
+    scored = []
+    for kind in kinds:
+        baseline = trends["baseline"][kind]
+        for term, count in trends["recent"][kind].items():
+            if count < min_count:
+                continue
+            recent_rate = count / trends["window_buckets"]
+            baseline_rate = baseline.get(term, 0) / trends["baseline_buckets"]
+            scored.append((term, count, (recent_rate + smoothing) / (baseline_rate + smoothing)))
+    return sorted(scored, key=lambda item: item[2], reverse=True)[:n]
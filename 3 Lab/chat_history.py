@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+from collections import deque
+from itertools import islice
+
+HISTORY_DIR = "chat_history"
+HISTORY_CAPACITY = 1000
+SEGMENT_MESSAGES = 10000
+PAGE_SIZE = 50
+
+
+def create_room_history(room_name, directory=HISTORY_DIR, capacity=HISTORY_CAPACITY):
+    room_directory = os.path.join(directory, hashlib.sha1(room_name.encode()).hexdigest())
+    os.makedirs(room_directory, exist_ok=True)
+
+    history = {
+        "directory": room_directory,
+        "recent": deque(maxlen=capacity),
+        "count": 0,
+        "segment": None,
+        "segment_index": None
+    }
+    history["count"] = recover_message_count(history)
+    history["recent"].extend(read_messages(history, max(0, history["count"] - capacity), history["count"]))
+    return history
+
+def segment_path(history, segment_index):
+    return os.path.join(history["directory"], f"{segment_index:08d}.log")
+
+def recover_message_count(history):
+    segments = sorted(name for name in os.listdir(history["directory"]) if name.endswith(".log"))
+    if not segments:
+        return 0
+
+    last_index = int(segments[-1].split(".")[0])
+    with open(segment_path(history, last_index), "rb+") as segment:
+        data = segment.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            segment.truncate(complete)
+    return last_index * SEGMENT_MESSAGES + data.count(b"\n", 0, complete)
+
+def append_message(history, message):
+    segment_index = history["count"] // SEGMENT_MESSAGES
+    if history["segment_index"] != segment_index:
+        if history["segment"]:
+            history["segment"].close()
+        history["segment"] = open(segment_path(history, segment_index), "a", encoding="utf-8")
+        history["segment_index"] = segment_index
+
+    history["segment"].write(json.dumps(message, ensure_ascii=False) + "\n")
+    history["segment"].flush()
+    history["recent"].append(message)
+    history["count"] += 1
+
+def read_messages(history, start, end):
+    recent_start = history["count"] - len(history["recent"])
+    if start >= recent_start:
+        return list(islice(history["recent"], start - recent_start, end - recent_start))
+
+    messages = []
+    for segment_index in range(start // SEGMENT_MESSAGES, (end - 1) // SEGMENT_MESSAGES + 1):
+        first = segment_index * SEGMENT_MESSAGES
+        with open(segment_path(history, segment_index), "r", encoding="utf-8") as segment:
+            lines = islice(segment, max(start - first, 0), min(end - first, SEGMENT_MESSAGES))
+            messages.extend(json.loads(line) for line in lines)
+    return messages
+
+def get_recent_messages(history, count=PAGE_SIZE):
+    return read_messages(history, max(0, history["count"] - count), history["count"])
+
+def get_messages_before(history, before=None, page_size=PAGE_SIZE):
+    before = history["count"] if before is None else min(before, history["count"])
+    start = max(0, before - page_size)
+    return start, read_messages(history, start, before)
+
+def close_room_history(history):
+    if history["segment"]:
+        history["segment"].close()
+        history["segment"] = None
+        history["segment_index"] = None
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from collections import Counter
+
+from chat_history import create_room_history, append_message, get_messages_before, close_room_history
+
+HUB_SOCKET = "chat_hub.sock"
+BUS_LINE_LIMIT = 64 * 1024 * 1024
+
+hub_workers = {}
+hub_sessions = {}
+hub_users = {}
+room_workers = {}
+hub_histories = {}
+logger = logging.getLogger("chat_hub")
+
+
+def create_hub_socket(path=HUB_SOCKET):
+    if os.path.exists(path):
+        os.remove(path)
+    hub_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    hub_socket.bind(path)
+    hub_socket.listen()
+    return hub_socket
+
+
+def encode_bus_message(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode()
+
+
+def send_to_worker(worker_id, message):
+    if worker_id in hub_workers:
+        hub_workers[worker_id].write(encode_bus_message(message))
+
+
+def get_hub_history(room_name):
+    if room_name not in hub_histories:
+        hub_histories[room_name] = create_room_history(room_name)
+    return hub_histories[room_name]
+
+
+def add_session(worker_id, message):
+    session_key = (worker_id, message["session"])
+    user_name, room_name = message["user_name"], message["room_name"]
+
+    previous_key = hub_users.get(user_name)
+    if previous_key is not None and previous_key[0] != worker_id:
+        send_to_worker(previous_key[0], {"op": "evict", "user_name": user_name})
+
+    hub_users[user_name] = session_key
+    hub_sessions[session_key] = {"user_name": user_name, "room_name": room_name}
+    room_workers.setdefault(room_name, Counter())[worker_id] += 1
+
+
+def remove_session(session_key):
+    session = hub_sessions.pop(session_key, None)
+    if session is None:
+        return
+
+    if hub_users.get(session["user_name"]) == session_key:
+        del hub_users[session["user_name"]]
+
+    room_name = session["room_name"]
+    workers = room_workers[room_name]
+    workers[session_key[0]] -= 1
+    if workers[session_key[0]] <= 0:
+        del workers[session_key[0]]
+    if not workers:
+        del room_workers[room_name]
+        if room_name in hub_histories:
+            close_room_history(hub_histories.pop(room_name))
+
+
+def publish_message(room_name, message):
+    if room_name not in room_workers:
+        return
+
+    append_message(get_hub_history(room_name), message)
+    broadcast_to_room_workers(room_name, {"op": "message", "room_name": room_name, "message": message})
+
+
+def broadcast_to_room_workers(room_name, message):
+    for worker_id in room_workers.get(room_name, {}):
+        send_to_worker(worker_id, message)
+
+
+def handle_bus_message(worker_id, message):
+    operation = message["op"]
+    if operation == "join":
+        add_session(worker_id, message)
+        start, messages = get_messages_before(get_hub_history(message["room_name"]), None, message["page_size"])
+        send_to_worker(worker_id, {"op": "joined", "session": message["session"], "start": start,
+                                   "messages": messages})
+    elif operation == "leave":
+        remove_session((worker_id, message["session"]))
+    elif operation == "publish":
+        publish_message(message["room_name"], message["message"])
+    elif operation == "file_available":
+        broadcast_to_room_workers(message["room_name"], message)
+    elif operation == "history":
+        start, messages = get_messages_before(get_hub_history(message["room_name"]), message["before"],
+                                              message["page_size"])
+        send_to_worker(worker_id, {"op": "reply", "request": message["request"], "start": start,
+                                   "messages": messages})
+        if message["room_name"] not in room_workers:
+            close_room_history(hub_histories.pop(message["room_name"]))
+
+
+async def handle_worker(reader, writer):
+    worker_id = json.loads(await reader.readline())["worker"]
+    hub_workers[worker_id] = writer
+    logger.info("Worker %s connected to the hub", worker_id)
+
+    try:
+        while line := await reader.readline():
+            handle_bus_message(worker_id, json.loads(line))
+    finally:
+        for session_key in [key for key in hub_sessions if key[0] == worker_id]:
+            remove_session(session_key)
+        del hub_workers[worker_id]
+        logger.info("Worker %s disconnected from the hub", worker_id)
+        writer.close()
+
+
+async def run_hub(hub_socket):
+    server = await asyncio.start_unix_server(handle_worker, sock=hub_socket, limit=BUS_LINE_LIMIT)
+    async with server:
+        await server.serve_forever()
@@ -1,16 +1,34 @@
 import asyncio
+import json
 import os
+import queue
 import threading
 import tkinter as tk
 from tkinter import scrolledtext, filedialog
 
+from file_store import hash_file
+from protocol import (PROTOCOL_MAGIC, FRAME_HELLO, FRAME_CHAT, FRAME_HISTORY, FRAME_FILE_START, FRAME_FILE_CHUNK,
+                      FRAME_FILE_END, FRAME_FILE_OFFSET, FRAME_FILE_AVAILABLE, FRAME_FILE_GET, encode_frame,
+                      encode_frame_header, encode_json_frame, read_frame)
+
 asyncio_event_loop = None
 reader = None
 writer = None
 user_name = None
 active_room = None
+history_before = None
 chat_server_address = '127.0.0.1'
 chat_server_port = 20000
+file_chunk_size = 1024 * 1024
+upload_offset_timeout = 30
+next_stream_id = 1
+pending_uploads = {}
+downloads = {}
+available_files = []
+display_queue = queue.Queue()
+display_interval_ms = 50
+display_batch_size = 500
+scrollback_lines = 5000
 
 
 def center_window(window, width, height):
@@ -24,43 +42,141 @@ def center_window(window, width, height):
 
 
 async def send_message(writer, message):
-    writer.write((message + '\n').encode())
+    writer.write(encode_frame(FRAME_CHAT, message.encode()))
     await writer.drain()
 
 
-async def send_file(writer, file_path):
-    file_header = f"FILE:{os.path.basename(file_path)}\n"
-    writer.write(file_header.encode())
+async def request_history_before(writer, before):
+    writer.write(encode_frame(FRAME_HISTORY, str(before).encode()))
     await writer.drain()
 
+
+def allocate_stream_id():
+    global next_stream_id
+    stream_id = next_stream_id
+    next_stream_id += 1
+    return stream_id
+
+
+async def send_file(writer, file_path):
+    stream_id = allocate_stream_id()
+    file_name = os.path.basename(file_path)
     file_size = os.path.getsize(file_path)
-    writer.write(f"{file_size}\n".encode())
+    digest = await asyncio.to_thread(hash_file, file_path)
+
+    pending_uploads[stream_id] = asyncio.get_running_loop().create_future()
+    writer.write(encode_json_frame(FRAME_FILE_START, {"name": file_name, "size": file_size, "sha256": digest},
+                                   stream_id))
     await writer.drain()
+    try:
+        offset = await asyncio.wait_for(pending_uploads[stream_id], upload_offset_timeout)
+    except asyncio.TimeoutError:
+        show_message(f"Server did not answer the upload of {file_name}")
+        return
+    finally:
+        del pending_uploads[stream_id]
+
+    if offset < 0:
+        show_message(f"Server refused the upload of {file_name}")
+        return
 
     with open(file_path, 'rb') as file:
-        while chunk := file.read(1024):
+        file.seek(offset)
+        while chunk := file.read(file_chunk_size):
+            writer.write(encode_frame_header(FRAME_FILE_CHUNK, len(chunk), stream_id))
             writer.write(chunk)
             await writer.drain()
 
-    completion_message = f"Finished sending file: {os.path.basename(file_path)}\n"
-    writer.write(completion_message.encode())
+    writer.write(encode_frame(FRAME_FILE_END, b"", stream_id))
+    await writer.drain()
+
+
+async def download_file(writer, available_file, file_path):
+    stream_id = allocate_stream_id()
+    part_path = f"{file_path}.part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    downloads[stream_id] = {"sha256": available_file["sha256"], "path": file_path, "part_path": part_path, "file": None}
+
+    writer.write(encode_json_frame(FRAME_FILE_GET, {"sha256": available_file["sha256"], "offset": offset}, stream_id))
     await writer.drain()
 
 
-async def receive_messages(reader, chat_display_widget):
+async def handle_download_frame(frame_type, stream_id, payload):
+    download = downloads.get(stream_id)
+    if download is None:
+        return
+
+    if frame_type == FRAME_FILE_START:
+        header = json.loads(payload)
+        if header["size"] < 0:
+            del downloads[stream_id]
+            show_message("File is no longer available on the server")
+            return
+        download["file"] = open(download["part_path"], 'ab')
+        download["file"].truncate(header["offset"])
+    elif frame_type == FRAME_FILE_CHUNK and download["file"]:
+        download["file"].write(payload)
+    elif frame_type == FRAME_FILE_END:
+        del downloads[stream_id]
+        if download["file"]:
+            download["file"].close()
+        if await asyncio.to_thread(hash_file, download["part_path"]) == download["sha256"]:
+            os.replace(download["part_path"], download["path"])
+            show_message(f"Downloaded file: {download['path']}")
+        else:
+            os.remove(download["part_path"])
+            show_message(f"Download corrupted: {download['path']}")
+
+
+def show_message(message):
+    display_queue.put(message)
+
+
+def flush_display_queue():
+    messages = []
+    try:
+        while len(messages) < display_batch_size:
+            messages.append(display_queue.get_nowait())
+    except queue.Empty:
+        pass
+
+    if messages:
+        chat_display_widget.insert(tk.END, "".join(f"{message}\n" for message in messages))
+        line_count = int(chat_display_widget.index("end-1c").split(".")[0])
+        if line_count > scrollback_lines:
+            chat_display_widget.delete("1.0", f"{line_count - scrollback_lines}.0")
+        chat_display_widget.see(tk.END)
+
+    root.after(display_interval_ms, flush_display_queue)
+
+
+def add_available_file(available_file):
+    if available_file not in available_files:
+        available_files.append(available_file)
+
+
+async def receive_messages(reader):
+    global history_before
     while True:
-        data = await reader.read(100)
-        if not data:
+        try:
+            frame_type, stream_id, payload = await read_frame(reader)
+        except asyncio.IncompleteReadError:
             break
 
-        message = data.decode().strip()
-        print(f"Received message: {message}")
-        chat_display_widget.insert(tk.END, f"{message}\n")
-        chat_display_widget.see(tk.END)
+        if frame_type == FRAME_CHAT:
+            show_message(payload.decode())
+        elif frame_type == FRAME_HISTORY:
+            history_before = int(payload)
+        elif frame_type == FRAME_FILE_OFFSET and stream_id in pending_uploads:
+            pending_uploads[stream_id].set_result(json.loads(payload)["offset"])
+        elif frame_type == FRAME_FILE_AVAILABLE:
+            add_available_file(json.loads(payload))
+        elif frame_type in (FRAME_FILE_START, FRAME_FILE_CHUNK, FRAME_FILE_END):
+            await handle_download_frame(frame_type, stream_id, payload)
 
 
 async def register_client(chat_server_address, user_name, room_name):
-    global reader, writer, active_room
+    global reader, writer, active_room, history_before
 
     if writer:
         writer.close()
@@ -68,16 +184,14 @@ async def register_client(chat_server_address, user_name, room_name):
 
     reader, writer = await asyncio.open_connection(chat_server_address, chat_server_port)
 
-    writer.write(f"{user_name}\n".encode())
-    await writer.drain()
-
-    writer.write(f"{room_name}\n".encode())
+    writer.write(PROTOCOL_MAGIC + encode_json_frame(FRAME_HELLO, {"user_name": user_name, "room_name": room_name}))
     await writer.drain()
 
     active_room = room_name
+    history_before = None
     print(f"Client {user_name} registered in room: {room_name}")
 
-    asyncio.create_task(receive_messages(reader, chat_display_widget))
+    asyncio.create_task(receive_messages(reader))
 
 
 async def disconnect_client():
@@ -147,12 +261,55 @@ def on_send_button_click():
         asyncio.run_coroutine_threadsafe(send_message(writer, message), asyncio_event_loop)
 
 
+def on_history_button_click():
+    global history_before
+    before = history_before
+    if not before:
+        return
+    history_before = None
+    asyncio.run_coroutine_threadsafe(request_history_before(writer, before), asyncio_event_loop)
+
+
 def on_send_file_button_click():
     file_path = filedialog.askopenfilename()
     if file_path:
         asyncio.run_coroutine_threadsafe(send_file(writer, file_path), asyncio_event_loop)
 
 
+def download_available_file(available_file):
+    file_path = filedialog.asksaveasfilename(initialfile=available_file["name"])
+    if file_path:
+        asyncio.run_coroutine_threadsafe(download_file(writer, available_file, file_path), asyncio_event_loop)
+
+
+def on_download_file_button_click():
+    files = list(available_files)
+    if not files:
+        return
+
+    download_dialog = tk.Toplevel(root)
+    download_dialog.title("Download File")
+
+    form_frame = tk.Frame(download_dialog, padx=10, pady=10)
+    form_frame.pack(padx=10, pady=10)
+
+    files_listbox = tk.Listbox(form_frame, width=60, height=10)
+    files_listbox.pack(fill="both", expand=True)
+    for available_file in files:
+        files_listbox.insert(tk.END, f"{available_file['name']} ({available_file['size']} bytes)")
+    files_listbox.selection_set(tk.END)
+
+    def on_confirm():
+        selection = files_listbox.curselection()
+        if selection:
+            download_dialog.destroy()
+            download_available_file(files[selection[0]])
+
+    files_listbox.bind("<Double-Button-1>", lambda event: on_confirm())
+    download_button = tk.Button(form_frame, text="Download", command=on_confirm)
+    download_button.pack(pady=(10, 0))
+
+
 root = tk.Tk()
 root.geometry("800x450")
 root.title("Chat Client")
@@ -186,10 +343,17 @@ send_button.pack(side="right", padx=(5, 0))
 send_file_button = tk.Button(input_frame, text="Send File", command=lambda: on_send_file_button_click())
 send_file_button.pack(side="right", padx=(5, 0))
 
+download_file_button = tk.Button(input_frame, text="Download File", command=on_download_file_button_click)
+download_file_button.pack(side="right", padx=(5, 0))
+
+history_button = tk.Button(input_frame, text="Older Messages", command=on_history_button_click)
+history_button.pack(side="right", padx=(5, 0))
+
 client_thread = threading.Thread(target=start_client, daemon=True)
 client_thread.start()
 
 open_registration_dialog()
 
 root.protocol("WM_DELETE_WINDOW", lambda: asyncio.run_coroutine_threadsafe(disconnect_client(), asyncio_event_loop))
+root.after(display_interval_ms, flush_display_queue)
 root.mainloop()
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import uuid
+
+FILE_STORE_DIR = "chat_files"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def create_file_store(directory=FILE_STORE_DIR):
+    store = {
+        "blobs": os.path.join(directory, "blobs"),
+        "partial": os.path.join(directory, "partial")
+    }
+    os.makedirs(store["blobs"], exist_ok=True)
+    os.makedirs(store["partial"], exist_ok=True)
+    return store
+
+def is_valid_digest(digest):
+    return isinstance(digest, str) and len(digest) == 64 and all(char in "0123456789abcdef" for char in digest)
+
+def blob_path(store, digest):
+    return os.path.join(store["blobs"], digest)
+
+def partial_path(store, digest):
+    return os.path.join(store["partial"], f"{digest}.part")
+
+def lock_path(store, digest):
+    return os.path.join(store["partial"], f"{digest}.lock")
+
+def has_blob(store, digest):
+    return os.path.exists(blob_path(store, digest))
+
+def get_blob_size(store, digest):
+    return os.path.getsize(blob_path(store, digest))
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_stale_lock(path):
+    try:
+        with open(path, "r") as file:
+            pid = int(file.read())
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except (OSError, ValueError):
+        return False
+    return False
+
+def acquire_upload(store, digest):
+    path = lock_path(store, digest)
+    for _ in range(2):
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not is_stale_lock(path):
+                return False
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(descriptor, "w") as file:
+            file.write(str(os.getpid()))
+        return True
+    return False
+
+def release_upload(store, digest):
+    try:
+        os.remove(lock_path(store, digest))
+    except FileNotFoundError:
+        pass
+
+def open_upload(store, digest, size):
+    file = open(partial_path(store, digest), "ab")
+    if file.tell() > size:
+        file.truncate(0)
+        file.seek(0)
+    return file
+
+def finish_upload(store, digest):
+    path = partial_path(store, digest)
+    if hash_file(path) != digest:
+        os.remove(path)
+        return False
+    os.replace(path, blob_path(store, digest))
+    return True
+
+def create_temp_upload(store):
+    path = os.path.join(store["partial"], f"{uuid.uuid4().hex}.tmp")
+    return path, open(path, "wb"), hashlib.sha256()
+
+def commit_temp_upload(store, path, digest):
+    if has_blob(store, digest):
+        os.remove(path)
+    else:
+        os.replace(path, blob_path(store, digest))
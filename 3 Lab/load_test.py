@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+LATENCY_MARKER = ": lt "
+CONNECT_CONCURRENCY = 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless load generator for the chat server")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1000, help="number of bot connections")
+    parser.add_argument("--room-size", type=int, default=10, help="bots per room, i.e. broadcast fan-out")
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second sent by each bot")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of sending")
+    parser.add_argument("--file-size", type=int, default=0, help="bytes per uploaded file, 0 disables uploads")
+    parser.add_argument("--upload-every", type=float, default=5.0, help="seconds between uploads of one bot")
+    parser.add_argument("--uploaders", type=int, default=1, help="number of bots that upload files")
+    parser.add_argument("--server-pid", type=int, help="server process id to report RSS for")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def create_stats():
+    return {"latencies": [], "sent": 0, "expected": 0, "received": 0, "uploaded_bytes": 0, "errors": 0}
+
+
+def read_rss_kib(pid):
+    total = 0
+    for process_id in [pid] + list_child_pids(pid):
+        try:
+            with open(f"/proc/{process_id}/status", "r") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+
+def list_child_pids(pid):
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r") as file:
+                children.extend(int(child) for child in file.read().split())
+    except OSError:
+        return children
+    return children + [grandchild for child in children for grandchild in list_child_pids(child)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def connect_bot(args, bot_id, connect_limit):
+    async with connect_limit:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+        writer.write(f"bot{bot_id}\nroom{bot_id // args.room_size}\n".encode())
+        await writer.drain()
+    return {"id": bot_id, "reader": reader, "writer": writer}
+
+
+async def receive_bot_messages(bot, stats, started):
+    while line := await bot["reader"].readline():
+        message = line.decode(errors="replace").rstrip("\n")
+        marker = message.find(LATENCY_MARKER)
+        if marker < 0:
+            continue
+        try:
+            sent_at = float(message[marker + len(LATENCY_MARKER):])
+        except ValueError:
+            continue
+        if sent_at >= started:
+            stats["latencies"].append(time.time() - sent_at)
+            stats["received"] += 1
+
+
+async def send_bot_messages(bot, args, stats, deadline):
+    interval = 1 / args.rate
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.time() < deadline:
+        bot["writer"].write(f"lt {time.time():.6f}\n".encode())
+        stats["sent"] += 1
+        stats["expected"] += bot["fanout"]
+        await bot["writer"].drain()
+        await asyncio.sleep(interval)
+
+
+async def upload_bot_files(bot, args, stats, deadline):
+    while time.time() < deadline:
+        payload = os.urandom(args.file_size)
+        bot["writer"].write(f"FILE:load-test-{bot['id']}-{stats['uploaded_bytes']}.bin\n{len(payload)}\n".encode())
+        bot["writer"].write(payload)
+        await bot["writer"].drain()
+        stats["uploaded_bytes"] += len(payload)
+        await asyncio.sleep(args.upload_every)
+
+
+async def run_load_test(args):
+    stats = create_stats()
+    connect_limit = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    connected = await asyncio.gather(*(connect_bot(args, bot_id, connect_limit) for bot_id in range(args.clients)),
+                                     return_exceptions=True)
+    bots = [bot for bot in connected if isinstance(bot, dict)]
+    stats["errors"] = len(connected) - len(bots)
+    room_members = Counter(bot["id"] // args.room_size for bot in bots)
+    for bot in bots:
+        bot["fanout"] = room_members[bot["id"] // args.room_size]
+
+    rss_before = read_rss_kib(args.server_pid) if args.server_pid else None
+    started = time.time()
+    deadline = started + args.duration
+    receivers = [asyncio.create_task(receive_bot_messages(bot, stats, started)) for bot in bots]
+    senders = [send_bot_messages(bot, args, stats, deadline) for bot in bots]
+    if args.file_size:
+        senders += [upload_bot_files(bot, args, stats, deadline) for bot in bots[:args.uploaders]]
+
+    await asyncio.gather(*senders)
+    rss_after = read_rss_kib(args.server_pid) if args.server_pid else None
+    await asyncio.sleep(1)
+    elapsed = time.time() - started
+
+    for receiver in receivers:
+        receiver.cancel()
+    for bot in bots:
+        bot["writer"].close()
+
+    return build_report(stats, len(bots), len(room_members), elapsed, rss_before, rss_after)
+
+
+def build_report(stats, bots, rooms, elapsed, rss_before, rss_after):
+    latencies = sorted(stats["latencies"])
+    to_ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        "clients": bots,
+        "connect_errors": stats["errors"],
+        "rooms": rooms,
+        "sent": stats["sent"],
+        "delivered": stats["received"],
+        "delivery_ratio": round(stats["received"] / stats["expected"], 4) if stats["expected"] else None,
+        "sent_per_second": round(stats["sent"] / elapsed, 1),
+        "delivered_per_second": round(stats["received"] / elapsed, 1),
+        "latency_ms": {
+            "p50": to_ms(percentile(latencies, 0.5)),
+            "p99": to_ms(percentile(latencies, 0.99)),
+            "p999": to_ms(percentile(latencies, 0.999)),
+            "max": to_ms(latencies[-1] if latencies else None)
+        },
+        "uploaded_bytes": stats["uploaded_bytes"],
+        "server_rss_kib": {"before": rss_before, "after": rss_after}
+    }
+
+
+def print_report(report):
+    print(f"Clients: {report['clients']} in {report['rooms']} rooms ({report['connect_errors']} connect errors)")
+    print(f"Sent: {report['sent']} ({report['sent_per_second']}/s)")
+    print(f"Delivered: {report['delivered']} ({report['delivered_per_second']}/s), ratio {report['delivery_ratio']}")
+    latency = report["latency_ms"]
+    print(f"Latency ms: p50 {latency['p50']}  p99 {latency['p99']}  p999 {latency['p999']}  max {latency['max']}")
+    if report["uploaded_bytes"]:
+        print(f"Uploaded: {report['uploaded_bytes']} bytes")
+    if report["server_rss_kib"]["before"] is not None:
+        print(f"Server RSS KiB: {report['server_rss_kib']['before']} -> {report['server_rss_kib']['after']}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run_load_test(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,137 @@
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+LOG_MESSAGES_PER_SECOND = 20
+PROFILER_INTERVAL = 0.005
+PROFILER_STACK_DEPTH = 8
+PROFILER_REPORT_STACKS = 20
+
+metrics = {"counters": Counter(), "gauges": Counter(), "histograms": {}}
+profiler = {"running": False, "thread": None, "samples": Counter(), "sample_count": 0}
+
+
+def increment(name, value=1):
+    metrics["counters"][name] += value
+
+def add_gauge(name, delta):
+    metrics["gauges"][name] += delta
+
+def observe(name, value, buckets=TIME_BUCKETS):
+    histogram = metrics["histograms"].get(name)
+    if histogram is None:
+        histogram = metrics["histograms"][name] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1),
+                                                   "sum": 0, "count": 0}
+    histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+def format_metrics():
+    lines = [f"# pid {os.getpid()}"]
+    lines += [f"{name}_total {value}" for name, value in sorted(metrics["counters"].items())]
+    lines += [f"{name} {value}" for name, value in sorted(metrics["gauges"].items())]
+    for name, histogram in sorted(metrics["histograms"].items()):
+        cumulative = 0
+        for bound, count in zip(histogram["buckets"] + ("+Inf",), histogram["counts"]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum {histogram['sum']:.6f}")
+        lines.append(f"{name}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+async def handle_metrics_request(reader, writer):
+    try:
+        while (await reader.readline()).strip():
+            pass
+        body = format_metrics().encode()
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def start_metrics_server(host, port):
+    return await asyncio.start_server(handle_metrics_request, host, port)
+
+
+def dump_metrics():
+    sys.stderr.write(format_metrics())
+    sys.stderr.flush()
+
+
+def sample_stacks(target_thread_id, interval):
+    while profiler["running"]:
+        frame = sys._current_frames().get(target_thread_id)
+        stack = []
+        while frame is not None and len(stack) < PROFILER_STACK_DEPTH:
+            stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}")
+            frame = frame.f_back
+        if stack:
+            profiler["samples"][tuple(stack)] += 1
+            profiler["sample_count"] += 1
+        time.sleep(interval)
+
+def start_profiler(interval=PROFILER_INTERVAL):
+    if profiler["running"]:
+        return
+    profiler["running"] = True
+    profiler["samples"].clear()
+    profiler["sample_count"] = 0
+    profiler["thread"] = threading.Thread(target=sample_stacks, args=(threading.get_ident(), interval), daemon=True)
+    profiler["thread"].start()
+
+def stop_profiler():
+    if not profiler["running"]:
+        return ""
+    profiler["running"] = False
+    profiler["thread"].join()
+
+    lines = [f"# profile of pid {os.getpid()}: {profiler['sample_count']} samples"]
+    for stack, count in profiler["samples"].most_common(PROFILER_REPORT_STACKS):
+        lines.append(f"{count / profiler['sample_count']:7.2%}  " + " <- ".join(stack))
+    return "\n".join(lines) + "\n"
+
+def toggle_profiler():
+    if profiler["running"]:
+        sys.stderr.write(stop_profiler())
+        sys.stderr.flush()
+    else:
+        start_profiler()
+
+
+def create_rate_limit_filter(per_second=LOG_MESSAGES_PER_SECOND):
+    windows = {}
+
+    def rate_limit(record):
+        now = int(time.monotonic())
+        key = (record.name, record.levelno, record.msg)
+        window = windows.get(key)
+        if window is None or window["second"] != now:
+            suppressed = window["suppressed"] if window else 0
+            window = windows[key] = {"second": now, "count": 0, "suppressed": suppressed}
+
+        window["count"] += 1
+        if window["count"] > per_second:
+            window["suppressed"] += 1
+            return False
+
+        if window["suppressed"]:
+            record.msg = f"{record.msg} ({window['suppressed']} similar messages suppressed)"
+            window["suppressed"] = 0
+        return True
+
+    return rate_limit
+
+def configure_logging(level="INFO", per_second=LOG_MESSAGES_PER_SECOND):
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(process)d %(levelname)s %(message)s"))
+    handler.addFilter(create_rate_limit_filter(per_second))
+    logging.basicConfig(level=level, handlers=[handler])
@@ -0,0 +1,38 @@
+import json
+import struct
+
+PROTOCOL_MAGIC = b"\x00CHT"
+PROTOCOL_VERSION = 1
+FRAME_HEADER = struct.Struct("!BBII")
+MAX_FRAME_PAYLOAD = 16 * 1024 * 1024
+
+FRAME_HELLO = 1
+FRAME_CHAT = 2
+FRAME_HISTORY = 3
+FRAME_FILE_START = 4
+FRAME_FILE_CHUNK = 5
+FRAME_FILE_END = 6
+FRAME_FILE_OFFSET = 7
+FRAME_FILE_AVAILABLE = 8
+FRAME_FILE_GET = 9
+
+
+def encode_frame_header(frame_type, length, stream_id=0):
+    return FRAME_HEADER.pack(PROTOCOL_VERSION, frame_type, stream_id, length)
+
+
+def encode_frame(frame_type, payload=b"", stream_id=0):
+    return encode_frame_header(frame_type, len(payload), stream_id) + payload
+
+
+def encode_json_frame(frame_type, value, stream_id=0):
+    return encode_frame(frame_type, json.dumps(value, ensure_ascii=False).encode(), stream_id)
+
+
+async def read_frame(reader):
+    version, frame_type, stream_id, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported protocol version: {version}")
+    if length > MAX_FRAME_PAYLOAD:
+        raise ValueError(f"Frame too large: {length} bytes")
+    return frame_type, stream_id, await reader.readexactly(length) if length else b""
@@ -1,115 +1,620 @@
+import argparse
 import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from chat_history import create_room_history, append_message, get_messages_before, close_room_history
+from chat_hub import HUB_SOCKET, BUS_LINE_LIMIT, create_hub_socket, encode_bus_message, run_hub
+from file_store import (create_file_store, is_valid_digest, blob_path, has_blob, get_blob_size, acquire_upload,
+                        release_upload, open_upload, finish_upload, create_temp_upload, commit_temp_upload)
+from metrics import (SIZE_BUCKETS, increment, add_gauge, observe, start_metrics_server, dump_metrics,
+                     start_profiler, toggle_profiler, configure_logging)
+from protocol import (PROTOCOL_MAGIC, FRAME_HELLO, FRAME_CHAT, FRAME_HISTORY, FRAME_FILE_START, FRAME_FILE_CHUNK,
+                      FRAME_FILE_END, FRAME_FILE_OFFSET, FRAME_FILE_AVAILABLE, FRAME_FILE_GET, FRAME_HEADER,
+                      encode_frame, encode_frame_header, encode_json_frame, read_frame)
+
+HISTORY_REPLAY_MESSAGES = 50
+OUTBOX_HIGH_WATER = 1000
+SLOW_CLIENT_POLICY = "drop"
+TEXT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+WRITE_COALESCING = True
+COALESCE_WINDOW = 0.001
+COALESCE_MAX_DELAY = 0.005
+COALESCE_MAX_BYTES = 64 * 1024
 
 room_clients = {}
+user_sessions = {}
+client_sessions = {}
 clients_lock = asyncio.Lock()
 room_chat_histories = {}
+client_outboxes = {}
+file_store = None
+hub_writer = None
+hub_requests = {}
+pending_joins = {}
+session_ids = itertools.count()
+request_ids = itertools.count()
+logger = logging.getLogger("chat_server")
 
 
 async def handle_client(reader, writer):
     client_address = writer.get_extra_info('peername')
-    print(f"New connection: {client_address}")
+    logger.info("New connection: %s", client_address)
+    increment("connections")
+    add_gauge("connections_active", 1)
+    user_name = room_name = None
 
     try:
-        user_name = (await reader.readline()).decode().strip()
-        room_name = (await reader.readline()).decode().strip()
+        first_byte = await reader.readexactly(1)
+        framed = first_byte == PROTOCOL_MAGIC[:1]
+        if framed:
+            if await reader.readexactly(len(PROTOCOL_MAGIC) - 1) != PROTOCOL_MAGIC[1:]:
+                raise ValueError("Unknown protocol")
+            user_name, room_name = await read_framed_handshake(reader)
+        else:
+            user_name = (first_byte + await reader.readline()).decode().strip()
+            room_name = (await reader.readline()).decode().strip()
+
+        start_client_outbox(writer, user_name, framed)
+        await join_room(writer, user_name, room_name)
+        logger.info("Client %s %s joined the room %s", user_name, client_address, room_name)
+
+        if framed:
+            await serve_framed_client(reader, writer, user_name, room_name, client_address)
+        else:
+            await serve_text_client(reader, writer, user_name, room_name, client_address)
 
-        await disconnect_user_from_previous_room(user_name)
+    except Exception as e:
+        increment("client_errors")
+        logger.warning("Client error %s: %s", user_name, e)
 
-        if room_name not in room_clients:
-            room_clients[room_name] = []
-        room_clients[room_name].append((user_name, writer))
-        print(f"Client {user_name} {client_address} joined the room {room_name}")
+    finally:
+        await leave_room(writer)
+        stop_client_outbox(writer)
+        add_gauge("connections_active", -1)
+        logger.info("Client %s %s left the room %s", user_name, client_address, room_name)
+        writer.close()
+        await writer.wait_closed()
 
-        await send_chat_history_to_client(writer, room_name)
 
-        while True:
-            data = await reader.readline()
-            if not data:
-                break
+async def read_framed_handshake(reader):
+    frame_type, _, payload = await read_frame(reader)
+    if frame_type != FRAME_HELLO:
+        raise ValueError("Expected a hello frame")
+    hello = json.loads(payload)
+    return hello["user_name"].strip(), hello["room_name"].strip()
 
-            client_message = data.decode().strip()
 
-            if client_message.startswith("FILE:"):
-                await handle_file_transfer(reader, client_message[5:], user_name, room_name)
-            else:
-                print(f"{user_name} ({client_address}) in room {room_name}: {client_message}")
-                await send_message_to_room(room_name, f"{user_name}: {client_message}")
+async def serve_text_client(reader, writer, user_name, room_name, client_address):
+    while True:
+        data = await reader.readline()
+        if not data:
+            break
 
-    except Exception as e:
-        print(f"Client error {user_name}: {e}")
+        increment("bytes_in", len(data))
+        client_message = data.decode().strip()
 
-    finally:
-        async with clients_lock:
-            if room_name in room_clients:
-                room_clients[room_name] = [client for client in room_clients[room_name] if client[1] != writer]
-                if not room_clients[room_name]:
-                    del room_clients[room_name]
-
-        print(f"Client {user_name} {client_address} left the room {room_name}")
-        writer.close()
-        await writer.wait_closed()
+        if client_message.startswith("FILE:"):
+            await handle_file_transfer(reader, client_message[5:], user_name, room_name)
+        elif client_message.startswith("HISTORY:"):
+            await send_history_page_to_client(writer, room_name, client_message[8:])
+        else:
+            logger.debug("%s (%s) in room %s: %s", user_name, client_address, room_name, client_message)
+            await send_message_to_room(room_name, f"{user_name}: {client_message}")
 
 
-async def disconnect_user_from_previous_room(user_name):
-    for room_name in list(room_clients.keys()):
-        for client in room_clients[room_name]:
-            if client[0] == user_name:
-                room_clients[room_name].remove(client)
+async def serve_framed_client(reader, writer, user_name, room_name, client_address):
+    uploads = {}
+    try:
+        while True:
+            try:
+                frame_type, stream_id, payload = await read_frame(reader)
+            except asyncio.IncompleteReadError:
+                break
+            increment("bytes_in", FRAME_HEADER.size + len(payload))
 
-                await send_message_to_room(room_name, f"{user_name} has left the room.")
+            if frame_type == FRAME_CHAT:
+                client_message = payload.decode()
+                logger.debug("%s (%s) in room %s: %s", user_name, client_address, room_name, client_message)
+                await send_message_to_room(room_name, f"{user_name}: {client_message}")
+            elif frame_type == FRAME_HISTORY:
+                await send_history_page_to_client(writer, room_name, payload.decode())
+            elif frame_type == FRAME_FILE_START:
+                await start_framed_upload(writer, uploads, stream_id, json.loads(payload), user_name, room_name)
+            elif frame_type == FRAME_FILE_CHUNK and stream_id in uploads and uploads[stream_id]["file"]:
+                uploads[stream_id]["file"].write(payload)
+            elif frame_type == FRAME_FILE_END and stream_id in uploads:
+                await finish_framed_upload(uploads.pop(stream_id), user_name, room_name)
+            elif frame_type == FRAME_FILE_GET:
+                request_download(writer, stream_id, json.loads(payload))
+    finally:
+        for upload in uploads.values():
+            if upload["file"]:
+                upload["file"].close()
+                release_upload(file_store, upload["digest"])
+
+
+async def start_framed_upload(writer, uploads, stream_id, request, user_name, room_name):
+    file_name = os.path.basename(str(request.get("name", "")))
+    digest = request.get("sha256")
+    size = request.get("size")
+    if not file_name or not is_valid_digest(digest) or not isinstance(size, int) or size < 0:
+        send_to_client(writer, encode_json_frame(FRAME_FILE_OFFSET, {"offset": -1}, stream_id), control=True)
+        return
 
-                if not room_clients[room_name]:
-                    del room_clients[room_name]
-                return
+    upload = {"name": file_name, "digest": digest, "size": size, "file": None}
+    if has_blob(file_store, digest):
+        offset = size
+    elif not acquire_upload(file_store, digest):
+        offset = -1
+    elif has_blob(file_store, digest):
+        release_upload(file_store, digest)
+        offset = size
+    else:
+        upload["file"] = open_upload(file_store, digest, size)
+        offset = upload["file"].tell()
+        await send_message_to_room(room_name, f"{user_name} is sending a file: {file_name}")
+
+    if offset >= 0:
+        uploads[stream_id] = upload
+    send_to_client(writer, encode_json_frame(FRAME_FILE_OFFSET, {"offset": offset}, stream_id), control=True)
+
+
+async def finish_framed_upload(upload, user_name, room_name):
+    if upload["file"]:
+        upload["file"].close()
+        try:
+            stored = await asyncio.to_thread(finish_upload, file_store, upload["digest"])
+        finally:
+            release_upload(file_store, upload["digest"])
+        if not stored:
+            await send_message_to_room(room_name, f"File upload failed: {upload['name']}")
+            return
+
+    if has_blob(file_store, upload["digest"]):
+        await announce_file(room_name, user_name, upload["name"], upload["digest"])
+
+
+async def announce_file(room_name, user_name, file_name, digest):
+    size = get_blob_size(file_store, digest)
+    await send_message_to_room(room_name, f"{user_name} shared a file: {file_name} ({size} bytes)")
+
+    available_file = {"name": file_name, "sha256": digest, "size": size}
+    if hub_writer:
+        send_to_hub({"op": "file_available", "room_name": room_name, "file": available_file})
+    else:
+        deliver_file_to_room(room_name, available_file)
+
+
+def deliver_file_to_room(room_name, available_file):
+    available = encode_json_frame(FRAME_FILE_AVAILABLE, available_file)
+    for writer in room_clients.get(room_name, {}):
+        if is_framed_client(writer):
+            send_to_client(writer, available, control=True)
+
+
+def request_download(writer, stream_id, request):
+    digest = request.get("sha256")
+    if not is_valid_digest(digest) or not has_blob(file_store, digest):
+        send_to_client(writer, encode_json_frame(FRAME_FILE_START, {"sha256": digest, "size": -1}, stream_id),
+                       control=True)
+        return
+    offset = request.get("offset", 0)
+    send_to_client(writer, {"sha256": digest, "stream_id": stream_id, "offset": offset if isinstance(offset, int) else 0},
+                   control=True)
+
+
+async def send_blob(writer, download):
+    path = blob_path(file_store, download["sha256"])
+    size = os.path.getsize(path)
+    offset = max(0, min(download["offset"], size))
+    stream_id = download["stream_id"]
+
+    writer.write(encode_json_frame(FRAME_FILE_START, {"sha256": download["sha256"], "size": size, "offset": offset},
+                                   stream_id))
+    loop = asyncio.get_running_loop()
+    with open(path, 'rb') as file:
+        while offset < size:
+            count = min(DOWNLOAD_CHUNK_SIZE, size - offset)
+            writer.write(encode_frame_header(FRAME_FILE_CHUNK, count, stream_id))
+            await writer.drain()
+            await loop.sendfile(writer.transport, file, offset, count)
+            increment("bytes_out", FRAME_HEADER.size + count)
+            offset += count
+    writer.write(encode_frame(FRAME_FILE_END, b"", stream_id))
+
+
+async def join_room(writer, user_name, room_name):
+    async with clients_lock:
+        previous_writer = user_sessions.get(user_name)
+        if previous_writer is not None and previous_writer is not writer:
+            previous_room = remove_client_from_room(previous_writer)
+            await send_message_to_room(previous_room, f"{user_name} has left the room.")
+        elif writer in client_sessions:
+            remove_client_from_room(writer)
+
+        session_id = next(session_ids)
+        user_sessions[user_name] = writer
+        client_sessions[writer] = {"user_name": user_name, "room_name": room_name, "session_id": session_id}
+        if hub_writer:
+            pending_joins[session_id] = writer
+            send_to_hub({"op": "join", "session": session_id, "user_name": user_name, "room_name": room_name,
+                         "page_size": HISTORY_REPLAY_MESSAGES})
+        else:
+            start, messages = get_messages_before(get_room_history(room_name), None, HISTORY_REPLAY_MESSAGES)
+            enter_room(writer, room_name, user_name, start, messages)
+
+
+def enter_room(writer, room_name, user_name, start, messages):
+    framed = is_framed_client(writer)
+    send_to_client(writer, encode_messages(messages, framed) + encode_history_cursor(start, framed))
+    room_clients.setdefault(room_name, {})[writer] = user_name
+
+
+def finish_hub_join(session_id, start, messages):
+    writer = pending_joins.pop(session_id, None)
+    session = client_sessions.get(writer)
+    if session is not None:
+        enter_room(writer, session["room_name"], session["user_name"], start, messages)
+
+
+async def leave_room(writer):
+    async with clients_lock:
+        remove_client_from_room(writer)
+
+
+async def evict_user(user_name):
+    async with clients_lock:
+        writer = user_sessions.get(user_name)
+        if writer is not None:
+            room_name = remove_client_from_room(writer)
+            await send_message_to_room(room_name, f"{user_name} has left the room.")
+
+
+def remove_client_from_room(writer):
+    session = client_sessions.pop(writer, None)
+    if session is None:
+        return None
+
+    if user_sessions.get(session["user_name"]) is writer:
+        del user_sessions[session["user_name"]]
+    if hub_writer:
+        pending_joins.pop(session["session_id"], None)
+        send_to_hub({"op": "leave", "session": session["session_id"]})
+
+    room_name = session["room_name"]
+    members = room_clients.get(room_name)
+    if members is not None:
+        members.pop(writer, None)
+        if not members:
+            del room_clients[room_name]
+            release_room_history(room_name)
+    return room_name
 
 
 async def handle_file_transfer(reader, file_name, user_name, room_name):
-    await send_message_to_room(room_name, f"{user_name} is sending a file: {file_name}")
-
+    file_name = os.path.basename(file_name)
     size_data = await reader.readline()
 
     try:
         file_size = int(size_data.decode().strip())
     except ValueError:
-        print(f"Invalid file size received from {user_name}.")
+        file_size = -1
+    if file_size < 0:
+        logger.warning("Invalid file size received from %s.", user_name)
         return
 
-    with open(file_name, 'wb') as file:
-        bytes_received = 0
-        while bytes_received < file_size:
-            chunk = await reader.read(1024)
-            if not chunk:
-                break
-            file.write(chunk)
-            bytes_received += len(chunk)
+    await send_message_to_room(room_name, f"{user_name} is sending a file: {file_name}")
+    path, file, digest = create_temp_upload(file_store)
+    bytes_received = 0
+    try:
+        with file:
+            while bytes_received < file_size:
+                chunk = await reader.read(min(TEXT_UPLOAD_CHUNK_SIZE, file_size - bytes_received))
+                if not chunk:
+                    break
+                file.write(chunk)
+                digest.update(chunk)
+                bytes_received += len(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    finally:
+        increment("bytes_in", bytes_received)
+
+    if bytes_received < file_size:
+        os.remove(path)
+        return
+
+    commit_temp_upload(file_store, path, digest.hexdigest())
+    await announce_file(room_name, user_name, file_name, digest.hexdigest())
+
 
-    await send_message_to_room(room_name, f"File received: {file_name}")
+def get_room_history(room_name):
+    if room_name not in room_chat_histories:
+        room_chat_histories[room_name] = create_room_history(room_name)
+    return room_chat_histories[room_name]
 
 
-async def send_chat_history_to_client(writer, room_name):
+def release_room_history(room_name):
     if room_name in room_chat_histories:
-        for message in room_chat_histories[room_name]:
-            writer.write(f"{message}\n".encode())
+        close_room_history(room_chat_histories.pop(room_name))
+
+
+def start_client_outbox(writer, user_name, framed=False):
+    outbox = asyncio.Queue()
+    client_outboxes[writer] = {
+        "user_name": user_name,
+        "framed": framed,
+        "queue": outbox,
+        "task": asyncio.create_task(drain_client_outbox(writer, outbox)),
+        "dropped": 0
+    }
+
+
+def stop_client_outbox(writer):
+    outbox = client_outboxes.pop(writer, None)
+    if outbox:
+        outbox["task"].cancel()
+
+
+async def drain_client_outbox(writer, outbox):
+    pending = None
+    try:
+        while True:
+            item = pending if pending is not None else await outbox.get()
+            pending = None
+            if isinstance(item, bytes):
+                batch = [item]
+                if WRITE_COALESCING:
+                    pending = await collect_outbox_batch(outbox, batch)
+                writer.writelines(batch)
+                increment("bytes_out", sum(map(len, batch)))
+                observe("write_batch_messages", len(batch), SIZE_BUCKETS)
+            else:
+                await send_blob(writer, item)
+            drain_started = time.perf_counter()
             await writer.drain()
+            observe("drain_wait_seconds", time.perf_counter() - drain_started)
+    except ConnectionError as e:
+        logger.warning("Send error %s: %s", client_outboxes.get(writer, {}).get('user_name'), e)
+        writer.close()
+
+
+async def collect_outbox_batch(outbox, batch):
+    loop = asyncio.get_running_loop()
+    flush_at = loop.time() + COALESCE_MAX_DELAY
+    size = len(batch[0])
+
+    while size < COALESCE_MAX_BYTES:
+        if outbox.empty():
+            delay = min(COALESCE_WINDOW, flush_at - loop.time())
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            if outbox.empty():
+                break
+
+        item = outbox.get_nowait()
+        if not isinstance(item, bytes):
+            return item
+        batch.append(item)
+        size += len(item)
+    return None
+
+
+def is_framed_client(writer):
+    return writer in client_outboxes and client_outboxes[writer]["framed"]
+
+
+def encode_messages(messages, framed):
+    if framed:
+        return b"".join(encode_frame(FRAME_CHAT, message.encode()) for message in messages)
+    return "".join(f"{message}\n" for message in messages).encode()
+
+
+def encode_history_cursor(start, framed):
+    if framed:
+        return encode_frame(FRAME_HISTORY, str(start).encode())
+    return f"HISTORY:{start}\n".encode()
+
+
+def send_to_client(writer, data, control=False):
+    outbox = client_outboxes.get(writer)
+    if outbox is None:
+        return
+
+    depth = outbox["queue"].qsize()
+    observe("outbox_depth", depth, SIZE_BUCKETS)
+    if control or depth < OUTBOX_HIGH_WATER:
+        outbox["queue"].put_nowait(data)
+        return
+
+    increment("outbox_overflows")
+    if SLOW_CLIENT_POLICY == "disconnect":
+        logger.warning("Disconnecting slow client %s", outbox['user_name'])
+        stop_client_outbox(writer)
+        writer.close()
+    else:
+        outbox["dropped"] += 1
+
+
+async def load_messages_before(room_name, before):
+    if hub_writer:
+        reply = await request_from_hub({"op": "history", "room_name": room_name, "before": before,
+                                        "page_size": HISTORY_REPLAY_MESSAGES})
+        return reply["start"], reply["messages"]
+    return get_messages_before(get_room_history(room_name), before, HISTORY_REPLAY_MESSAGES)
+
+
+async def send_history_page_to_client(writer, room_name, before):
+    try:
+        before = int(before)
+    except ValueError:
+        return
+    if before < 0:
+        return
+
+    start, messages = await load_messages_before(room_name, before)
+    if messages:
+        lines = [f"--- History before message {before} ---"] + messages
+    else:
+        lines = [f"--- No history before message {before} ---"]
+    framed = is_framed_client(writer)
+    send_to_client(writer, encode_messages(lines, framed) + encode_history_cursor(start, framed))
 
 
 async def send_message_to_room(room_name, message):
-    if room_name in room_clients:
-        if room_name not in room_chat_histories:
-            room_chat_histories[room_name] = []
-        room_chat_histories[room_name].append(message)
+    increment("messages")
+    if hub_writer:
+        send_to_hub({"op": "publish", "room_name": room_name, "message": message})
+    elif room_name in room_clients:
+        append_message(get_room_history(room_name), message)
+        deliver_to_room(room_name, message)
 
-        for _, writer in room_clients[room_name]:
-            writer.write(f"{message}\n".encode())
-            await writer.drain()
+
+def deliver_to_room(room_name, message):
+    observe("room_fanout", len(room_clients.get(room_name, {})), SIZE_BUCKETS)
+    encoded = {}
+    for writer in room_clients.get(room_name, {}):
+        framed = is_framed_client(writer)
+        if framed not in encoded:
+            encoded[framed] = encode_messages([message], framed)
+        send_to_client(writer, encoded[framed])
 
 
-async def main():
-    server = await asyncio.start_server(handle_client, '127.0.0.1', 20000)
+def send_to_hub(message):
+    hub_writer.write(encode_bus_message(message))
+
+
+async def request_from_hub(message):
+    request_id = next(request_ids)
+    hub_requests[request_id] = asyncio.get_running_loop().create_future()
+    send_to_hub(dict(message, request=request_id))
+    try:
+        return await hub_requests[request_id]
+    finally:
+        del hub_requests[request_id]
+
+
+async def connect_to_hub(hub_path):
+    global hub_writer
+    reader, hub_writer = await asyncio.open_unix_connection(hub_path, limit=BUS_LINE_LIMIT)
+    send_to_hub({"op": "hello", "worker": os.getpid()})
+    return asyncio.create_task(listen_to_hub(reader))
+
+
+async def listen_to_hub(reader):
+    while line := await reader.readline():
+        message = json.loads(line)
+        if message["op"] == "message":
+            deliver_to_room(message["room_name"], message["message"])
+        elif message["op"] == "file_available":
+            deliver_file_to_room(message["room_name"], message["file"])
+        elif message["op"] == "joined":
+            finish_hub_join(message["session"], message["start"], message["messages"])
+        elif message["op"] == "reply" and message["request"] in hub_requests:
+            hub_requests[message["request"]].set_result(message)
+        elif message["op"] == "evict":
+            await evict_user(message["user_name"])
+    logger.error("Lost connection to the hub")
+
+
+def install_instrumentation(profile):
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGUSR1, dump_metrics)
+    loop.add_signal_handler(signal.SIGUSR2, toggle_profiler)
+    if profile:
+        start_profiler()
+
+
+async def main(host, port, reuse_port=False, hub_path=None, metrics_port=None, profile=False):
+    global file_store
+    file_store = create_file_store()
+    install_instrumentation(profile)
+    hub_task = await connect_to_hub(hub_path) if hub_path else None
+
+    if metrics_port:
+        await start_metrics_server(host, metrics_port)
+        logger.info("Metrics available on http://%s:%s/", host, metrics_port)
+
+    server = await asyncio.start_server(handle_client, host, port, reuse_port=reuse_port)
     server_address = server.sockets[0].getsockname()
-    print(f"Server works on {server_address}")
+    logger.info("Server %s works on %s", os.getpid(), server_address)
     async with server:
-        await server.serve_forever()
+        if hub_task:
+            await asyncio.wait([asyncio.create_task(server.serve_forever()), hub_task],
+                               return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await server.serve_forever()
+
 
+def run_worker(host, port, hub_path, metrics_port, profile):
+    try:
+        asyncio.run(main(host, port, True, hub_path, metrics_port, profile))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_cluster(host, port, workers, hub_path, metrics_port=None, profile=False):
+    hub_socket = create_hub_socket(hub_path)
+    processes = [
+        multiprocessing.Process(target=run_worker,
+                                args=(host, port, hub_path, metrics_port + index if metrics_port else None, profile))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
 
-asyncio.run(main())
+    try:
+        asyncio.run(run_hub(hub_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        os.remove(hub_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Asyncio chat server")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the port via SO_REUSEPORT")
+    parser.add_argument("--hub-socket", default=HUB_SOCKET, help="Unix socket of the local message hub")
+    parser.add_argument("--metrics-port", type=int, help="serve plain-text metrics over HTTP, one port per worker")
+    parser.add_argument("--profile", action="store_true", help="start the sampling profiler, SIGUSR2 toggles it")
+    parser.add_argument("--outbox-high-water", type=int, default=OUTBOX_HIGH_WATER,
+                        help="messages queued per client before the slow client policy applies")
+    parser.add_argument("--slow-client-policy", default=SLOW_CLIENT_POLICY, choices=["drop", "disconnect"],
+                        help="what to do with a client whose outbox is full")
+    parser.add_argument("--no-coalescing", action="store_true", help="write every outbound message separately")
+    parser.add_argument("--coalesce-window", type=float, default=COALESCE_WINDOW * 1000,
+                        help="milliseconds to wait for more outbound messages before a flush")
+    parser.add_argument("--coalesce-max-delay", type=float, default=COALESCE_MAX_DELAY * 1000,
+                        help="milliseconds a buffered message may wait before it is flushed")
+    parser.add_argument("--coalesce-bytes", type=int, default=COALESCE_MAX_BYTES, help="flush threshold in bytes")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(args.log_level)
+    OUTBOX_HIGH_WATER = args.outbox_high_water
+    SLOW_CLIENT_POLICY = args.slow_client_policy
+    WRITE_COALESCING = not args.no_coalescing
+    COALESCE_WINDOW = args.coalesce_window / 1000
+    COALESCE_MAX_DELAY = args.coalesce_max_delay / 1000
+    COALESCE_MAX_BYTES = args.coalesce_bytes
+    if args.workers > 1:
+        run_cluster(args.host, args.port, args.workers, args.hub_socket, args.metrics_port, args.profile)
+    else:
+        asyncio.run(main(args.host, args.port, metrics_port=args.metrics_port, profile=args.profile))
@@ -2,9 +2,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
+import bisect
 import json
+import re
 
 book_tree = None
+TOKEN_PATTERN = re.compile(r"\w+")
 
 
 def load_books(filename="4 lab/books.json"):
@@ -12,6 +15,82 @@ def load_books(filename="4 lab/books.json"):
         return json.load(file)
 
 
+def build_catalog_index(books):
+    index = {
+        "positions": {id(book): position for position, book in enumerate(books)},
+        "descriptions": [book["description"].lower() for book in books],
+        "tokens": {},
+        "genres": {},
+        "authors": {}
+    }
+    for position, book in enumerate(books):
+        for token in set(TOKEN_PATTERN.findall(index["descriptions"][position])):
+            index["tokens"].setdefault(token, []).append(position)
+        index["genres"].setdefault(book["genre"].lower(), []).append(position)
+        for author in {author.lower() for author in book["author"]}:
+            index["authors"].setdefault(author, []).append(position)
+
+    index["vocabulary_tokens"] = sorted(index["tokens"])
+    index["vocabulary_offsets"] = []
+    offset = 1
+    for token in index["vocabulary_tokens"]:
+        index["vocabulary_offsets"].append(offset)
+        offset += len(token) + 1
+    index["vocabulary"] = "\n" + "\n".join(index["vocabulary_tokens"]) + "\n"
+    return index
+
+
+def find_vocabulary_tokens(index, fragment):
+    tokens = set()
+    position = index["vocabulary"].find(fragment)
+    while position >= 0:
+        token_number = bisect.bisect_right(index["vocabulary_offsets"], position + 1) - 1
+        tokens.add(index["vocabulary_tokens"][token_number])
+        position = index["vocabulary"].find(fragment, position + 1)
+    return tokens
+
+
+def find_keyword_candidates(index, keyword):
+    matches = list(TOKEN_PATTERN.finditer(keyword))
+    if not matches:
+        return range(len(index["descriptions"]))
+
+    exact = [match.group() for match in matches if 0 < match.start() and match.end() < len(keyword)]
+    if exact:
+        return min((index["tokens"].get(token, []) for token in exact), key=len)
+
+    first, last = matches[0], matches[-1]
+    if first.start() > 0:
+        tokens = find_vocabulary_tokens(index, "\n" + last.group())
+    elif last.end() < len(keyword) or len(matches) > 1:
+        tokens = find_vocabulary_tokens(index, first.group() + "\n")
+    else:
+        tokens = find_vocabulary_tokens(index, first.group())
+    return {position for token in tokens for position in index["tokens"][token]}
+
+
+def score_catalog(index, preferences):
+    scores = {}
+    for genre in {genre.lower() for genre in preferences["genres"]}:
+        for position in index["genres"].get(genre, []):
+            scores[position] = scores.get(position, 0) + 10
+
+    author_matches = {position for author in {author.lower() for author in preferences["authors"]}
+                      for position in index["authors"].get(author, [])}
+    for position in author_matches:
+        scores[position] = scores.get(position, 0) + 5
+
+    keyword_matches = set()
+    for keyword in {keyword.lower() for keyword in preferences["keywords"] if keyword.strip()}:
+        keyword_matches.update(
+            position for position in find_keyword_candidates(index, keyword)
+            if position not in keyword_matches and keyword in index["descriptions"][position]
+        )
+    for position in keyword_matches:
+        scores[position] = scores.get(position, 0) + 2
+    return scores
+
+
 def create_preferences(genres, authors, keywords):
     return {
         "genres": genres,
@@ -39,9 +118,15 @@ def calculate_match_score(book, preferences):
     return score
 
 
-def recommend_books(books, preferences):
-    rated_books = [(book, calculate_match_score(book, preferences)) for book in books]
-    return sorted(rated_books, key=lambda x: x[1], reverse=True)
+def recommend_books(books, preferences, index=None):
+    if index is None:
+        rated_books = [(book, calculate_match_score(book, preferences)) for book in books]
+        return sorted(rated_books, key=lambda x: x[1], reverse=True)
+
+    scores = score_catalog(index, preferences)
+    rated_books = [(book, scores.get(index["positions"][id(book)], 0)) for book in books]
+    matched_books = sorted((rated for rated in rated_books if rated[1]), key=lambda x: x[1], reverse=True)
+    return matched_books + [rated for rated in rated_books if not rated[1]]
 
 
 def update_author_display(selected_authors, authors_text_var):
@@ -108,7 +193,7 @@ def display_recommendations(recommendations, results_frame):
     scrollbar.grid(row=0, column=1, sticky="ns", pady=(6, 0))
 
 
-def get_recommendations(books, genre_vars, selected_authors, keywords_entry, year_from_entry, year_to_entry, sort_option, sort_order, only_selected_genres_var, display_recommendations, results_frame):
+def get_recommendations(books, genre_vars, selected_authors, keywords_entry, year_from_entry, year_to_entry, sort_option, sort_order, only_selected_genres_var, display_recommendations, results_frame, catalog_index=None):
     selected_genres = [genre for genre, var in genre_vars.items() if var.get()]
     preferences = create_preferences(selected_genres, list(selected_authors), keywords_entry.get().split(", "))
 
@@ -128,7 +213,7 @@ def get_recommendations(books, genre_vars, selected_authors, keywords_entry, yea
     elif sort_option.get() == "year":
         filtered_books.sort(key=lambda x: x.get("year", 0), reverse=sort_reverse)
 
-    recommendations = recommend_books(filtered_books, preferences)
+    recommendations = recommend_books(filtered_books, preferences, catalog_index)
     display_recommendations(recommendations, results_frame)
 
 
@@ -177,6 +262,7 @@ root.geometry("800x600")
 root.resizable(False, False)
 
 books = load_books()
+catalog_index = build_catalog_index(books)
 genres = sorted({book["genre"] for book in books})
 authors = sorted({author for book in books for author in book["author"]})
 
@@ -285,7 +371,7 @@ tk.Button(
     command=lambda: get_recommendations(
         books, genre_vars, selected_authors, keywords_entry, year_from_entry,
         year_to_entry, sort_option, sort_order, only_selected_genres_var,
-        display_recommendations, results_inner_frame
+        display_recommendations, results_inner_frame, catalog_index
     )
 ).pack(side="left", padx=10)
 